@@ -1,25 +1,121 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Depends
+from fastapi import FastAPI, APIRouter, HTTPException, Depends, Header, Query, Request, Response
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from fastapi.responses import StreamingResponse, ORJSONResponse
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import UpdateOne, ReturnDocument, IndexModel, ASCENDING, DESCENDING
+from pymongo.errors import BulkWriteError, CollectionInvalid, DuplicateKeyError
+from pymongo import monitoring
+from prometheus_client import Counter, Gauge, Histogram, CONTENT_TYPE_LATEST, generate_latest
 import os
 import logging
 from pathlib import Path
 from pydantic import BaseModel, Field
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Callable, Awaitable, Tuple, AsyncIterator
 import uuid
 from datetime import datetime, timedelta
+from collections import OrderedDict
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+import multiprocessing
 import httpx
 import asyncio
 import json
+import orjson
+import random
+import time
+import base64
+import hashlib
+import heapq
+import tempfile
+import functools
+from email.utils import parsedate_to_datetime
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
+# Metrics, exposed in Prometheus text format on /metrics
+HTTP_REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds", "Time spent serving API requests", ["method", "route", "status"]
+)
+VINTED_CALL_SECONDS = Histogram(
+    "vinted_call_duration_seconds", "Time spent in VintedClient methods, retries included", ["method", "status"]
+)
+MONGO_COMMAND_SECONDS = Histogram(
+    "mongo_command_duration_seconds", "Time spent in MongoDB commands", ["command", "collection", "outcome"]
+)
+ITEMS_IMPORTED = Counter("vinted_items_imported_total", "Wardrobe items processed by imports", ["result"])
+ITEMS_RELISTED = Counter("vinted_items_relisted_total", "Products processed by relists", ["result"])
+CACHE_LOOKUPS = Counter("cache_lookups_total", "Lookups in the in-process caches", ["cache", "result"])
+CACHE_ENTRIES = Gauge("cache_entries", "Entries held by the in-process caches", ["cache"])
+CACHE_BYTES = Gauge("cache_bytes", "Approximate size of the values held by the in-process caches", ["cache"])
+
+class MongoCommandMetrics(monitoring.CommandListener):
+    """Time every command sent by the Mongo client, labelled by command and collection"""
+
+    def __init__(self):
+        self._collections: Dict[int, str] = {}
+
+    def started(self, event):
+        collection = event.command.get(event.command_name)
+        self._collections[event.request_id] = collection if isinstance(collection, str) else ""
+
+    def _observe(self, event, outcome: str):
+        collection = self._collections.pop(event.request_id, "")
+        MONGO_COMMAND_SECONDS.labels(event.command_name, collection, outcome).observe(event.duration_micros / 1e6)
+
+    def succeeded(self, event):
+        self._observe(event, "succeeded")
+
+    def failed(self, event):
+        self._observe(event, "failed")
+
+def instrument_vinted_call(method):
+    """Record a VintedClient method's duration, labelled with the Vinted status it ended with"""
+    @functools.wraps(method)
+    async def wrapper(*args, **kwargs):
+        started = time.monotonic()
+        status = "200"
+        try:
+            return await method(*args, **kwargs)
+        except HTTPException as e:
+            status = str(e.status_code)
+            raise
+        except Exception:
+            status = "error"
+            raise
+        finally:
+            VINTED_CALL_SECONDS.labels(method.__name__, status).observe(time.monotonic() - started)
+    return wrapper
+
+class MetricsMiddleware:
+    """ASGI middleware timing each request until its response has been sent, labelled by route template"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        started = time.monotonic()
+        status = "500"
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = str(message["status"])
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            # Only matched route templates are used as labels, so unknown paths can't blow up cardinality
+            route = getattr(scope.get("route"), "path", "unmatched")
+            HTTP_REQUEST_SECONDS.labels(scope["method"], route, status).observe(time.monotonic() - started)
+
 # MongoDB connection
 mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
+client = AsyncIOMotorClient(mongo_url, event_listeners=[MongoCommandMetrics()])
 db = client[os.environ['DB_NAME']]
 
 # Create the main app without a prefix
@@ -62,6 +158,16 @@ class VintedProduct(BaseModel):
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
     user_id: str
+    content_hash: Optional[str] = None
+    # Vinted ids needed to relist the item faithfully
+    brand_id: Optional[int] = None
+    catalog_id: Optional[int] = None
+    size_id: Optional[int] = None
+    status_id: Optional[int] = None
+    package_size_id: Optional[int] = None
+    color_ids: List[int] = []
+    item_attributes: List[Dict[str, Any]] = []
+    is_unisex: bool = False
 
 class DashboardStats(BaseModel):
     total_products: int
@@ -74,12 +180,341 @@ class DashboardStats(BaseModel):
 
 class RelistRequest(BaseModel):
     product_ids: List[str]
+    delete_original: bool = False  # delete the old listing once the new one is live
+
+class RelistPolicy(BaseModel):
+    user_id: str
+    enabled: bool = True
+    min_age_days: int = 7  # relist items not relisted for this many days
+    max_views: Optional[int] = None  # ...and with fewer views than this, if set
+    batch_size: int = 20
+    delete_original: bool = False
+    next_run_at: Optional[datetime] = None
+    last_run_at: Optional[datetime] = None
+    last_result: Optional[Dict[str, Any]] = None
+
+class RelistPolicyUpdate(BaseModel):
+    enabled: bool = True
+    min_age_days: int = Field(7, ge=1)
+    max_views: Optional[int] = Field(None, ge=0)
+    batch_size: int = Field(20, ge=1, le=500)
+    delete_original: bool = False
+
+class Job(BaseModel):
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    type: str  # import, relist
+    user_id: str
+    params: Dict[str, Any] = {}
+    status: str = "queued"  # queued, running, completed, failed
+    total: int = 0
+    processed: int = 0
+    succeeded: int = 0
+    failed: int = 0
+    results: List[Dict[str, Any]] = []
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    heartbeat_at: Optional[datetime] = None
+
+# Vinted HTTP transport
+VINTED_BASE_URL = os.environ.get('VINTED_BASE_URL', 'https://www.vinted.co.uk').rstrip('/')
+
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+class TokenBucket:
+    """Async token bucket: `rate` tokens per second with bursts of up to `capacity`"""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+        self.blocked_until = 0.0  # wall-clock time, so it can be shared between processes
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    async def acquire(self, tokens: float = 1.0):
+        async with self._lock:
+            blocked_for = self.blocked_until - time.time()
+            if blocked_for > 0:
+                await asyncio.sleep(blocked_for)
+            self._refill()
+            while self.tokens < tokens:
+                await asyncio.sleep((tokens - self.tokens) / self.rate)
+                self._refill()
+            self.tokens -= tokens
+
+    def block_for(self, seconds: float):
+        self.blocked_until = max(self.blocked_until, time.time() + seconds)
+
+class AdaptiveTokenBucket(TokenBucket):
+    """Token bucket whose rate follows AIMD; pending changes are merged into the shared state on sync"""
+
+    def __init__(self, rate: float, capacity: float, min_rate: float, max_rate: float):
+        super().__init__(rate, capacity)
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.pending_factor = 1.0
+        self.pending_increase = 0.0
+        self.used_at = time.monotonic()
+
+    def increase(self, step: float):
+        rate = min(self.max_rate, self.rate + step)
+        self.pending_increase += rate - self.rate
+        self.rate = rate
+
+    def decrease(self, factor: float):
+        rate = max(self.min_rate, self.rate * factor)
+        self.pending_factor *= rate / self.rate
+        self.rate = rate
+
+def retry_after_seconds(response: httpx.Response) -> Optional[float]:
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, (retry_at - datetime.now(retry_at.tzinfo)).total_seconds())
+
+def account_key(auth_token: str) -> str:
+    """Stable, non-secret key for an account's rate budget"""
+    return hashlib.sha1(auth_token.encode()).hexdigest()[:16]
+
+class RateGovernor:
+    """
+    Global and per-account token buckets for Vinted calls. Rates adapt with AIMD: a success
+    under the latency target adds a little, a 429, 5xx or slow response halves the rate, and
+    Retry-After pauses the account. Worker processes merge their adjustments into shared
+    documents in the rate_governor collection and each takes an equal share of the rate.
+    Only scopes used in the last VINTED_GOVERNOR_IDLE_SECONDS are synced; idle account
+    buckets are dropped, so a worker only takes a share of the accounts it is calling.
+    """
+
+    def __init__(self):
+        self.account_rate = float(os.environ.get('VINTED_RATE_PER_SECOND', 5.0))
+        self.account_burst = float(os.environ.get('VINTED_RATE_BURST', 10.0))
+        self.account_max_rate = float(os.environ.get('VINTED_MAX_RATE_PER_SECOND', 10.0))
+        self.global_rate = float(os.environ.get('VINTED_GLOBAL_RATE_PER_SECOND', 20.0))
+        self.global_burst = float(os.environ.get('VINTED_GLOBAL_RATE_BURST', 40.0))
+        self.global_max_rate = float(os.environ.get('VINTED_GLOBAL_MAX_RATE_PER_SECOND', 50.0))
+        self.min_rate = float(os.environ.get('VINTED_MIN_RATE_PER_SECOND', 0.2))
+        self.increase_step = float(os.environ.get('VINTED_AIMD_INCREASE', 0.05))
+        self.decrease_factor = float(os.environ.get('VINTED_AIMD_DECREASE', 0.5))
+        self.latency_target = float(os.environ.get('VINTED_LATENCY_TARGET_SECONDS', 2.0))
+        self.sync_interval = float(os.environ.get('VINTED_GOVERNOR_SYNC_SECONDS', 5.0))
+        self.idle_seconds = float(os.environ.get('VINTED_GOVERNOR_IDLE_SECONDS', 30.0))
+        self.worker_id = uuid.uuid4().hex
+        self.global_bucket = AdaptiveTokenBucket(self.global_rate, self.global_burst, self.min_rate, self.global_max_rate)
+        self.accounts: Dict[str, AdaptiveTokenBucket] = {}
+        self.workers: Dict[str, int] = {}  # scope -> worker processes sharing it
+        self._task: Optional[asyncio.Task] = None
+
+    def _new_account_bucket(self) -> AdaptiveTokenBucket:
+        return AdaptiveTokenBucket(self.account_rate, self.account_burst, self.min_rate, self.account_max_rate)
+
+    def bucket_for(self, auth_token: str) -> AdaptiveTokenBucket:
+        key = account_key(auth_token)
+        bucket = self.accounts.get(key)
+        if bucket is None:
+            bucket = self.accounts[key] = self._new_account_bucket()
+        return bucket
+
+    def _use(self, auth_token: str) -> Tuple[AdaptiveTokenBucket, AdaptiveTokenBucket]:
+        buckets = (self.bucket_for(auth_token), self.global_bucket)
+        now = time.monotonic()
+        for bucket in buckets:
+            bucket.used_at = now
+        return buckets
+
+    async def acquire(self, auth_token: str):
+        for bucket in self._use(auth_token):
+            await bucket.acquire()
+
+    def observe(self, auth_token: str, status_code: int, latency: float, retry_after: Optional[float] = None):
+        buckets = self._use(auth_token)
+        if status_code == 429 or status_code >= 500 or latency > self.latency_target:
+            for bucket in buckets:
+                bucket.decrease(self.decrease_factor)
+            if retry_after:
+                buckets[0].block_for(retry_after)
+        else:
+            for bucket in buckets:
+                bucket.increase(self.increase_step)
+
+    def budgets(self, auth_token: Optional[str] = None) -> Dict[str, Any]:
+        def describe(bucket: AdaptiveTokenBucket, scope: str) -> Dict[str, Any]:
+            return {
+                "rate_per_second": round(bucket.rate, 3),
+                "tokens": round(bucket.tokens, 3),
+                "blocked_for_seconds": round(max(0.0, bucket.blocked_until - time.time()), 3),
+                "workers": self.workers.get(scope, 1)
+            }
+        budgets = {"global": describe(self.global_bucket, "global")}
+        if auth_token:
+            key = account_key(auth_token)
+            # Looking at an account's budget shouldn't start tracking (and syncing) it
+            budgets["account"] = describe(self.accounts.get(key) or self._new_account_bucket(), f"account:{key}")
+        return budgets
+
+    async def start(self):
+        self._task = asyncio.create_task(self._sync_loop())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _sync_loop(self):
+        while True:
+            await asyncio.sleep(self.sync_interval)
+            try:
+                await self.sync()
+            except Exception as e:
+                logging.error(f"Error syncing Vinted rate budgets: {str(e)}")
+
+    async def sync(self):
+        # A bucket used within the idle window has been synced at least once since its last use,
+        # so dropping it after that loses no pending changes
+        idle_before = time.monotonic() - self.idle_seconds
+        if self.global_bucket.used_at >= idle_before:
+            await self._sync_scope("global", self.global_bucket, self.global_rate)
+        for key, bucket in list(self.accounts.items()):
+            scope = f"account:{key}"
+            if bucket.used_at >= idle_before:
+                await self._sync_scope(scope, bucket, self.account_rate)
+            else:
+                del self.accounts[key]
+                self.workers.pop(scope, None)
+
+    async def _sync_scope(self, scope: str, bucket: AdaptiveTokenBucket, initial_rate: float):
+        """Merge this worker's pending AIMD changes into the shared rate and take our share of it"""
+        now = datetime.utcnow()
+        active_since = now - timedelta(seconds=self.sync_interval * 3)
+        factor, increase = bucket.pending_factor, bucket.pending_increase
+        bucket.pending_factor, bucket.pending_increase = 1.0, 0.0
+        shared_rate = {"$ifNull": ["$rate", initial_rate]}
+        shared = await db.rate_governor.find_one_and_update(
+            {"_id": scope},
+            [{"$set": {
+                "rate": {"$max": [bucket.min_rate, {"$min": [
+                    bucket.max_rate, {"$add": [{"$multiply": [shared_rate, factor]}, increase]}
+                ]}]},
+                "blocked_until": {"$max": [{"$ifNull": ["$blocked_until", 0]}, bucket.blocked_until]},
+                "workers": {"$mergeObjects": [{"$ifNull": ["$workers", {}]}, {self.worker_id: now}]},
+                "updated_at": now
+            }}],
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        active = {worker_id: seen for worker_id, seen in shared.get("workers", {}).items() if seen >= active_since}
+        stale = {f"workers.{worker_id}": seen for worker_id, seen in shared.get("workers", {}).items() if worker_id not in active}
+        if stale:
+            # Matching on the last-seen times leaves a worker alone if it synced again in the meantime
+            await db.rate_governor.update_one({"_id": scope, **stale}, {"$unset": {field: "" for field in stale}})
+        workers = max(1, len(active))
+        self.workers[scope] = workers
+        bucket.rate = max(bucket.min_rate, shared["rate"] / workers)
+        bucket.blocked_until = max(bucket.blocked_until, shared.get("blocked_until", 0))
+
+rate_governor = RateGovernor()
+
+class VintedTransport:
+    """
+    App-lifetime pool of keep-alive HTTP/2 connections to Vinted, one pool per account. Pools idle
+    for VINTED_CLIENT_IDLE_SECONDS are closed, and at most VINTED_MAX_CLIENTS are kept open.
+    """
+
+    def __init__(self):
+        self.limits = httpx.Limits(
+            max_connections=int(os.environ.get('VINTED_MAX_CONNECTIONS', 20)),
+            max_keepalive_connections=int(os.environ.get('VINTED_MAX_KEEPALIVE_CONNECTIONS', 10)),
+            keepalive_expiry=float(os.environ.get('VINTED_KEEPALIVE_EXPIRY', 30.0))
+        )
+        self.timeout = httpx.Timeout(
+            float(os.environ.get('VINTED_TIMEOUT', 30.0)),
+            connect=float(os.environ.get('VINTED_CONNECT_TIMEOUT', 10.0))
+        )
+        self.http2 = HTTP2_AVAILABLE and os.environ.get('VINTED_HTTP2', 'true').lower() == 'true'
+        self.max_retries = int(os.environ.get('VINTED_MAX_RETRIES', 3))
+        self.backoff_base = float(os.environ.get('VINTED_BACKOFF_BASE', 0.5))
+        self.backoff_max = float(os.environ.get('VINTED_BACKOFF_MAX', 10.0))
+        self.max_clients = int(os.environ.get('VINTED_MAX_CLIENTS', 256))
+        self.client_idle_seconds = float(os.environ.get('VINTED_CLIENT_IDLE_SECONDS', 300.0))
+        # account key -> (client, last used), least recently used first
+        self._clients: "OrderedDict[str, Tuple[httpx.AsyncClient, float]]" = OrderedDict()
+        self._closing: set = set()
+
+    def client_for(self, account_key: str) -> httpx.AsyncClient:
+        """Return the pooled client for an account (see account_key()), creating it on first use"""
+        now = time.monotonic()
+        client, _ = self._clients.pop(account_key, (None, 0.0))
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(
+                base_url=VINTED_BASE_URL,
+                http2=self.http2,
+                limits=self.limits,
+                timeout=self.timeout
+            )
+        self._clients[account_key] = (client, now)
+        self._evict(now)
+        return client
+
+    def _evict(self, now: float):
+        """Close the least recently used pools that have gone idle or don't fit under max_clients"""
+        # The most recently used pool is the one just handed out, so it always stays
+        while len(self._clients) > 1:
+            key, (client, used_at) = next(iter(self._clients.items()))
+            if len(self._clients) <= self.max_clients and now - used_at < self.client_idle_seconds:
+                break
+            del self._clients[key]
+            closing = asyncio.get_running_loop().create_task(client.aclose())
+            self._closing.add(closing)
+            closing.add_done_callback(self._closing.discard)
+
+    def download_client(self) -> httpx.AsyncClient:
+        """Pooled client for photo downloads from Vinted's image hosts"""
+        return self.client_for("__photos__")
+
+    async def aclose(self):
+        clients = [client for client, _ in self._clients.values()]
+        self._clients.clear()
+        await asyncio.gather(*(c.aclose() for c in clients), *self._closing, return_exceptions=True)
+
+vinted_transport: Optional[VintedTransport] = None
+
+WARDROBE_PAGE_SIZE = int(os.environ.get('WARDROBE_PAGE_SIZE', 96))
+WARDROBE_PAGE_CONCURRENCY = int(os.environ.get('WARDROBE_PAGE_CONCURRENCY', 5))
+
+def get_vinted_transport() -> VintedTransport:
+    global vinted_transport
+    if vinted_transport is None:
+        vinted_transport = VintedTransport()
+    return vinted_transport
 
 # Vinted API Client
 class VintedClient:
-    def __init__(self, csrf_token: str, auth_token: str):
+    def __init__(self, csrf_token: str, auth_token: str, transport: Optional[VintedTransport] = None):
         self.csrf_token = csrf_token
         self.auth_token = auth_token
+        self.transport = transport
         self.headers = {
             "x-csrf-token": csrf_token,
             "Authorization": f"Bearer {auth_token}",
@@ -95,60 +530,120 @@ class VintedClient:
             "sec-fetch-site": "same-origin"
         }
 
-    async def get_user_wardrobe(self, user_id: str, page: int = 1, per_page: int = 20):
-        url = f"https://www.vinted.co.uk/api/v2/wardrobe/{user_id}/items"
+    async def _send(self, method: str, url: str, **kwargs) -> httpx.Response:
+        """Send a request paced by the rate governor, retrying 429 and 5xx responses with jittered backoff"""
+        transport = self.transport or get_vinted_transport()
+        client = transport.client_for(account_key(self.auth_token))
+        attempt = 0
+        while True:
+            await rate_governor.acquire(self.auth_token)
+            for upload in (kwargs.get("files") or {}).values():
+                upload[1].seek(0)
+            started = time.monotonic()
+            response = await client.request(method, url, **kwargs)
+            retry_after = retry_after_seconds(response)
+            rate_governor.observe(self.auth_token, response.status_code, time.monotonic() - started, retry_after)
+            if (response.status_code != 429 and response.status_code < 500) or attempt >= transport.max_retries:
+                return response
+            delay = random.uniform(0, min(transport.backoff_max, transport.backoff_base * 2 ** attempt))
+            if retry_after:
+                delay = max(delay, retry_after)
+            logging.warning(f"Vinted {method} {url} returned {response.status_code}, retrying in {delay:.2f}s")
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    def _error(self, response: httpx.Response, message: str) -> HTTPException:
+        """Keep Vinted's status (and Retry-After) so callers can tell rate limiting from other failures"""
+        headers = {"Retry-After": response.headers["Retry-After"]} if "Retry-After" in response.headers else None
+        return HTTPException(status_code=response.status_code, detail=f"{message}: {response.text}", headers=headers)
+
+    @instrument_vinted_call
+    async def get_user_wardrobe(self, user_id: str, page: int = 1, per_page: int = 20, order: str = "relevance"):
+        url = f"/api/v2/wardrobe/{user_id}/items"
         params = {
             "page": page,
             "per_page": per_page,
-            "order": "relevance"
+            "order": order
         }
         headers = self.headers.copy()
         headers["X-Money-Object"] = "true"
         
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.get(url, headers=headers, params=params)
-                if response.status_code == 200:
-                    return response.json()
-                else:
-                    raise HTTPException(status_code=response.status_code, detail=f"Failed to fetch wardrobe: {response.text}")
-            except Exception as e:
-                raise HTTPException(status_code=500, detail=f"Error fetching wardrobe: {str(e)}")
+        try:
+            response = await self._send("GET", url, headers=headers, params=params)
+            if response.status_code == 200:
+                return response.json()
+            else:
+                raise self._error(response, "Failed to fetch wardrobe")
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Error fetching wardrobe: {str(e)}")
+
+    @instrument_vinted_call
+    async def get_full_wardrobe(self, user_id: str, per_page: int = WARDROBE_PAGE_SIZE, concurrency: int = WARDROBE_PAGE_CONCURRENCY):
+        """Fetch every wardrobe page; the first page tells us how many to fetch concurrently"""
+        first_page = await self.get_user_wardrobe(user_id, page=1, per_page=per_page)
+        items = list(first_page.get("items") or [])
+        pagination = first_page.get("pagination") or {}
+        total_pages = int(pagination.get("total_pages") or 1)
+
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def fetch_page(page: int):
+            async with semaphore:
+                return await self.get_user_wardrobe(user_id, page=page, per_page=per_page)
+
+        remaining = list(range(2, total_pages + 1))
+        pages = await asyncio.gather(*(fetch_page(page) for page in remaining), return_exceptions=True)
+
+        failed_pages = []
+        for page, result in zip(remaining, pages):
+            if isinstance(result, Exception):
+                logging.error(f"Error fetching wardrobe page {page} for {user_id}: {str(result)}")
+                failed_pages.append(page)
+            else:
+                items.extend(result.get("items") or [])
 
+        return {"items": items, "pagination": pagination, "failed_pages": failed_pages}
+
+    @instrument_vinted_call
     async def get_product_details(self, product_id: str):
-        url = f"https://www.vinted.co.uk/api/v2/item_upload/items/{product_id}"
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.get(url, headers=self.headers)
-                if response.status_code == 200:
-                    return response.json()
-                else:
-                    raise HTTPException(status_code=response.status_code, detail=f"Failed to fetch product details: {response.text}")
-            except Exception as e:
-                raise HTTPException(status_code=500, detail=f"Error fetching product: {str(e)}")
+        url = f"/api/v2/item_upload/items/{product_id}"
+        try:
+            response = await self._send("GET", url, headers=self.headers)
+            if response.status_code == 200:
+                return response.json()
+            else:
+                raise self._error(response, "Failed to fetch product details")
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Error fetching product: {str(e)}")
 
+    @instrument_vinted_call
     async def create_listing(self, listing_data: dict):
         """Create a new listing (relist) using the item_upload endpoint"""
-        url = "https://www.vinted.co.uk/api/v2/item_upload/items"
+        url = "/api/v2/item_upload/items"
         headers = self.headers.copy()
         headers["X-Upload-Form"] = "true"
         headers["X-Enable-Multiple-Size-Groups"] = "true"
         
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.post(url, headers=headers, json=listing_data)
-                if response.status_code == 200:
-                    return response.json()
-                else:
-                    raise HTTPException(status_code=response.status_code, detail=f"Failed to create listing: {response.text}")
-            except Exception as e:
-                raise HTTPException(status_code=500, detail=f"Error creating listing: {str(e)}")
+        try:
+            response = await self._send("POST", url, headers=headers, json=listing_data)
+            if response.status_code == 200:
+                return response.json()
+            else:
+                raise self._error(response, "Failed to create listing")
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Error creating listing: {str(e)}")
 
-    async def relist_product(self, product_data: dict):
+    @instrument_vinted_call
+    async def relist_product(self, product_data: dict, temp_uuid: Optional[str] = None):
         """Relist a product by creating a new listing with the same data"""
-        # Generate new UUID for the relist
-        import uuid
-        temp_uuid = str(uuid.uuid4())
+        # Generate new UUID for the relist unless photos were already uploaded under one
+        temp_uuid = temp_uuid or str(uuid.uuid4())
         
         # Create listing payload based on Vinted's expected format
         listing_payload = {
@@ -164,7 +659,7 @@ class VintedClient:
                 "catalog_id": product_data.get("catalog_id", 3829),
                 "isbn": None,
                 "is_unisex": product_data.get("is_unisex", False),
-                "status_id": 6,  # Available
+                "status_id": product_data.get("status_id", 6),
                 "video_game_rating_id": None,
                 "price": float(product_data.get("price", 0)),
                 "package_size_id": product_data.get("package_size_id", 2),
@@ -188,27 +683,169 @@ class VintedClient:
         
         return await self.create_listing(listing_payload)
 
+    @instrument_vinted_call
+    async def upload_photo(self, photo_path: Path, temp_uuid: str):
+        """Upload a photo for a listing being created under temp_uuid"""
+        url = "/api/v2/photos"
+        # Let httpx set the multipart content type and boundary
+        headers = {k: v for k, v in self.headers.items() if k != "Content-Type"}
+        
+        try:
+            with open(photo_path, "rb") as photo_file:
+                response = await self._send(
+                    "POST", url, headers=headers,
+                    data={"photo[type]": "item", "photo[temp_uuid]": temp_uuid},
+                    files={"photo[file]": (photo_path.name + ".jpg", photo_file, "image/jpeg")}
+                )
+            if response.status_code == 200:
+                return response.json()
+            else:
+                raise self._error(response, "Failed to upload photo")
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Error uploading photo: {str(e)}")
+
+    @instrument_vinted_call
     async def delete_product(self, product_id: str):
-        url = f"https://www.vinted.co.uk/api/v2/items/{product_id}/delete"
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.post(url, headers=self.headers)
-                if response.status_code == 200:
-                    return response.json()
-                else:
-                    raise HTTPException(status_code=response.status_code, detail=f"Failed to delete product: {response.text}")
-            except Exception as e:
-                raise HTTPException(status_code=500, detail=f"Error deleting product: {str(e)}")
+        url = f"/api/v2/items/{product_id}/delete"
+        try:
+            response = await self._send("POST", url, headers=self.headers)
+            if response.status_code == 200:
+                return response.json()
+            else:
+                raise self._error(response, "Failed to delete product")
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Error deleting product: {str(e)}")
 
 # Helper functions
-async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)) -> User:
+class TTLCache:
+    """
+    Bounded LRU cache whose entries also expire `ttl` seconds after they are set; `name` labels its metrics.
+    With `max_bytes`, `weigh(value)` sizes each entry and the total is kept under max_bytes too; a single
+    value larger than a quarter of that is not cached at all.
+    """
+
+    def __init__(self, name: str, maxsize: int, ttl: float, max_bytes: Optional[int] = None,
+                 weigh: Optional[Callable[[Any], int]] = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.weigh = weigh or (lambda value: 0)
+        self.bytes = 0
+        self._entries: "OrderedDict[Any, tuple]" = OrderedDict()  # key -> (expires at, value, size)
+        self._hits = CACHE_LOOKUPS.labels(name, "hit")
+        self._misses = CACHE_LOOKUPS.labels(name, "miss")
+        CACHE_ENTRIES.labels(name).set_function(lambda: len(self._entries))
+        CACHE_BYTES.labels(name).set_function(lambda: self.bytes)
+
+    def _remove(self, key):
+        self.bytes -= self._entries.pop(key)[2]
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            if entry is not None:
+                self._remove(key)
+            self._misses.inc()
+            return None
+        self._entries.move_to_end(key)
+        self._hits.inc()
+        return entry[1]
+
+    def set(self, key, value):
+        if key in self._entries:
+            self._remove(key)
+        size = self.weigh(value)
+        if self.max_bytes is not None and size > self.max_bytes // 4:
+            return
+        self._entries[key] = (time.monotonic() + self.ttl, value, size)
+        self.bytes += size
+        while len(self._entries) > self.maxsize or (self.max_bytes is not None and self.bytes > self.max_bytes):
+            self._remove(next(iter(self._entries)))
+
+    def invalidate(self, predicate: Callable[[Any], bool]):
+        for key in [key for key, (_, value, _) in self._entries.items() if predicate(value)]:
+            self._remove(key)
+
+# Bearer token -> User; entries for a csrf_token are dropped when /auth/login replaces that user
+auth_cache = TTLCache(
+    "auth",
+    maxsize=int(os.environ.get('AUTH_CACHE_SIZE', 1024)),
+    ttl=float(os.environ.get('AUTH_CACHE_TTL_SECONDS', 60))
+)
+
+class ProductVersions:
+    """
+    Per-user counter in Mongo, bumped on every write to a user's products so all workers see it.
+    Bump only once the products and user_stats are both written, or a response built in between
+    is cached under the new version.
+    """
+
+    async def get(self, user_id: str) -> int:
+        version_doc = await db.product_versions.find_one({"user_id": user_id}, {"_id": 0, "version": 1})
+        return version_doc["version"] if version_doc else 0
+
+    async def bump(self, user_id: str):
+        await db.product_versions.update_one(
+            {"user_id": user_id},
+            {"$inc": {"version": 1}, "$set": {"updated_at": datetime.utcnow()}},
+            upsert=True
+        )
+
+product_versions = ProductVersions()
+
+# (user_id, products version, path, query) -> (body, media type, headers) for product-derived GET responses
+# A page can hold up to PRODUCT_PAGE_MAX products, so the cache is bounded by body size as well as entries
+response_cache = TTLCache(
+    "responses",
+    maxsize=int(os.environ.get('RESPONSE_CACHE_SIZE', 2048)),
+    ttl=float(os.environ.get('RESPONSE_CACHE_TTL_SECONDS', 600)),
+    max_bytes=int(os.environ.get('RESPONSE_CACHE_MAX_BYTES', 64 * 1024 ** 2)),
+    weigh=lambda cached: len(cached[0])
+)
+
+async def cached_response(request: Request, user_id: str, build: Callable[[], Awaitable[Response]]) -> Response:
+    """
+    Serve a response that depends only on the user's products: 304 when If-None-Match carries the
+    current ETag, the cached body while the products version is unchanged, otherwise a fresh build.
+    """
+    version = await product_versions.get(user_id)
+    # Keyed by version, so entries for older versions are never served and simply age out
+    key = (user_id, version, request.url.path, str(request.query_params))
+    etag = '"' + hashlib.sha1(repr(key).encode()).hexdigest()[:20] + '"'
+    # Browsers revalidate on every use, so a stale page is never shown after an import or relist
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if etag in request.headers.get("If-None-Match", ""):
+        return Response(status_code=304, headers=headers)
+    
+    cached = response_cache.get(key)
+    if cached is None:
+        response = await build()
+        extra_headers = {name: value for name, value in response.headers.items() if name.lower().startswith("x-")}
+        cached = (response.body, response.media_type, extra_headers)
+        response_cache.set(key, cached)
+    body, media_type, extra_headers = cached
+    return Response(body, media_type=media_type, headers={**extra_headers, **headers})
+
+async def get_user_by_token(token: str) -> User:
+    user = auth_cache.get(token)
+    if user is not None:
+        return user
     try:
-        user_doc = await db.users.find_one({"id": credentials.credentials})
+        user_doc = await db.users.find_one({"id": token})
         if not user_doc:
             raise HTTPException(status_code=401, detail="Invalid authentication credentials")
-        return User(**user_doc)
+        user = User(**user_doc)
     except Exception:
         raise HTTPException(status_code=401, detail="Invalid authentication credentials")
+    auth_cache.set(token, user)
+    return user
+
+async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)) -> User:
+    return await get_user_by_token(credentials.credentials)
 
 def transform_vinted_product(vinted_item: dict, user_id: str) -> VintedProduct:
     """Transform Vinted API response to our product model"""
@@ -226,7 +863,13 @@ def transform_vinted_product(vinted_item: dict, user_id: str) -> VintedProduct:
         else:
             price_amount = float(vinted_item.get("price", 0))
     
-    return VintedProduct(
+    brand = vinted_item.get("brand") if isinstance(vinted_item.get("brand"), dict) else {}
+    catalog = vinted_item.get("catalog") if isinstance(vinted_item.get("catalog"), dict) else {}
+    color_ids = vinted_item.get("color_ids") or [
+        vinted_item[key] for key in ("color1_id", "color2_id") if vinted_item.get(key)
+    ]
+    
+    product = VintedProduct(
         id=str(uuid.uuid4()),
         vinted_id=str(vinted_item.get("id", "")),
         title=vinted_item.get("title", ""),
@@ -236,13 +879,1677 @@ def transform_vinted_product(vinted_item: dict, user_id: str) -> VintedProduct:
         brand=vinted_item.get("brand", {}).get("title", "") if vinted_item.get("brand") else "",
         size=vinted_item.get("size_title", ""),
         condition=vinted_item.get("status", ""),
+        # Vinted keeps sold items in the wardrobe as closed, which is what gives sold events their timing
+        status="sold" if vinted_item.get("item_closing_action") == "sold" else "active",
         category=vinted_item.get("catalog", {}).get("title", "") if vinted_item.get("catalog") else "",
         photos=photos,
         views=vinted_item.get("view_count", 0),
         likes=vinted_item.get("favourite_count", 0),
-        user_id=user_id
+        user_id=user_id,
+        brand_id=vinted_item.get("brand_id") or brand.get("id"),
+        catalog_id=vinted_item.get("catalog_id") or catalog.get("id"),
+        size_id=vinted_item.get("size_id"),
+        status_id=vinted_item.get("status_id"),
+        package_size_id=vinted_item.get("package_size_id"),
+        color_ids=color_ids,
+        item_attributes=vinted_item.get("item_attributes") or [],
+        is_unisex=bool(vinted_item.get("is_unisex", False))
+    )
+    product.content_hash = product_content_hash(product)
+    return product
+
+# Fields that come from Vinted; a change in any of them means the stored product is stale
+CONTENT_HASH_FIELDS = (
+    "title", "price", "currency", "description", "brand", "size", "condition",
+    "category", "photos", "views", "likes", "brand_id", "catalog_id", "size_id",
+    "status_id", "package_size_id", "color_ids", "item_attributes", "is_unisex", "status"
+)
+
+# Relist attributes are refreshed on import too, which backfills products imported before they were stored
+RELIST_ATTRIBUTE_FIELDS = (
+    "brand_id", "catalog_id", "size_id", "status_id", "package_size_id",
+    "color_ids", "item_attributes", "is_unisex"
+)
+
+def product_content_hash(product: VintedProduct) -> str:
+    content = {field: getattr(product, field) for field in CONTENT_HASH_FIELDS}
+    return hashlib.sha1(json.dumps(content, sort_keys=True).encode()).hexdigest()
+
+class VintedLookupCache:
+    """Brand and catalog title -> Vinted id tables, learned from imported items and kept in Mongo"""
+
+    def __init__(self):
+        self._ids: Dict[str, Dict[str, int]] = {"brand": {}, "catalog": {}}
+        self._loaded = False
+        self._lock = asyncio.Lock()
+
+    async def _ensure_loaded(self):
+        if self._loaded:
+            return
+        async with self._lock:
+            if not self._loaded:
+                async for entry in db.vinted_lookups.find({}, {"_id": 0}):
+                    self._ids.setdefault(entry["kind"], {})[entry["title"]] = entry["vinted_id"]
+                self._loaded = True
+
+    async def remember_products(self, products: List[VintedProduct]):
+        await self._ensure_loaded()
+        new_entries = {}
+        for product in products:
+            for kind, title, vinted_id in (("brand", product.brand, product.brand_id), ("catalog", product.category, product.catalog_id)):
+                if title and vinted_id and self._ids[kind].get(title) != vinted_id:
+                    self._ids[kind][title] = vinted_id
+                    new_entries[(kind, title)] = vinted_id
+        if new_entries:
+            await db.vinted_lookups.bulk_write([
+                UpdateOne({"kind": kind, "title": title}, {"$set": {"vinted_id": vinted_id}}, upsert=True)
+                for (kind, title), vinted_id in new_entries.items()
+            ], ordered=False)
+
+    async def resolve(self, kind: str, title: Optional[str]) -> Optional[int]:
+        if not title:
+            return None
+        await self._ensure_loaded()
+        return self._ids[kind].get(title)
+
+vinted_lookups = VintedLookupCache()
+
+# Fields refreshed on every import; everything else is only written when the product is first seen
+IMPORT_MUTABLE_FIELDS = ("title", "price", "views", "likes", "status", "content_hash", "updated_at") + RELIST_ATTRIBUTE_FIELDS
+
+ResultCallback = Optional[Callable[[Dict[str, Any]], Awaitable[None]]]
+
+# Transforming thousands of items is CPU-bound, so large batches are moved off the event loop
+TRANSFORM_EXECUTOR = os.environ.get('TRANSFORM_EXECUTOR', 'process')  # process, thread or inline
+TRANSFORM_OFFLOAD_THRESHOLD = int(os.environ.get('TRANSFORM_OFFLOAD_THRESHOLD', 500))
+TRANSFORM_CHUNK_SIZE = int(os.environ.get('TRANSFORM_CHUNK_SIZE', 250))
+TRANSFORM_WORKERS = int(os.environ.get('TRANSFORM_WORKERS', min(4, os.cpu_count() or 1)))
+
+transform_executor: Optional[Executor] = None
+
+def get_transform_executor() -> Optional[Executor]:
+    global transform_executor
+    if transform_executor is None and TRANSFORM_EXECUTOR == "process":
+        # spawn, not fork: forking a process that already runs Motor's and uvicorn's threads can deadlock
+        transform_executor = ProcessPoolExecutor(TRANSFORM_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+    elif transform_executor is None and TRANSFORM_EXECUTOR == "thread":
+        transform_executor = ThreadPoolExecutor(TRANSFORM_WORKERS, thread_name_prefix="transform")
+    return transform_executor
+
+def transform_chunk(items: List[dict], user_id: str) -> List[Tuple[Optional[dict], Optional[str]]]:
+    """
+    Transform a chunk of items into (product dict, error) pairs. Runs in the executor, so no I/O or
+    logging; plain dicts are much cheaper than models to pickle back from a worker process.
+    """
+    results = []
+    for item in items:
+        try:
+            results.append((transform_vinted_product(item, user_id).dict(), None))
+        except Exception as e:
+            results.append((None, str(e)))
+    return results
+
+async def transform_items(items: List[dict], user_id: str) -> AsyncIterator[Tuple[dict, Optional[VintedProduct], Optional[str]]]:
+    """Yield (item, product, error) in order; batches above the threshold are transformed in chunks on the executor"""
+    executor = get_transform_executor()
+    if executor is None or len(items) < TRANSFORM_OFFLOAD_THRESHOLD:
+        for item in items:
+            try:
+                yield item, transform_vinted_product(item, user_id), None
+            except Exception as e:
+                yield item, None, str(e)
+        return
+    loop = asyncio.get_running_loop()
+    chunks = [items[start:start + TRANSFORM_CHUNK_SIZE] for start in range(0, len(items), TRANSFORM_CHUNK_SIZE)]
+    # Every chunk is submitted up front; awaiting them in order streams results back as each one finishes
+    futures = [loop.run_in_executor(executor, transform_chunk, chunk, user_id) for chunk in chunks]
+    try:
+        for chunk, future in zip(chunks, futures):
+            for item, (product, error) in zip(chunk, await future):
+                # Already validated in the worker
+                yield item, VintedProduct.model_construct(**product) if product else None, error
+            # Awaiting a future that has already finished doesn't yield, so give other tasks a turn per chunk
+            await asyncio.sleep(0)
+    finally:
+        for future in futures:
+            future.cancel()
+
+async def transform_wardrobe_items(items: List[dict], user_id: str, on_result: ResultCallback = None):
+    """Transform wardrobe items, skipping duplicates; returns the products and the number that failed"""
+    products = []
+    failed_count = 0
+    seen = set()
+    unique_items = []
+    for item in items:
+        # Items can shift between pages while they are fetched concurrently
+        item_id = str(item.get("id", ""))
+        if item_id not in seen:
+            seen.add(item_id)
+            unique_items.append(item)
+    
+    async for item, product, error in transform_items(unique_items, user_id):
+        if product is not None:
+            products.append(product)
+            continue
+        logging.error(f"Error processing product {item.get('id', 'unknown')}: {error}")
+        failed_count += 1
+        if on_result:
+            await on_result({"vinted_id": str(item.get("id", "")), "success": False, "error": error})
+    await vinted_lookups.remember_products(products)
+    ITEMS_IMPORTED.labels("failed").inc(failed_count)
+    return products, failed_count
+
+def product_status_event(user_id: str, stored: dict, product: dict, timestamp: datetime) -> dict:
+    """A sold event (with when the product was listed) or a generic status change"""
+    current = {**product, "id": stored["id"]}
+    fields = {"from_status": stored.get("status"), "to_status": product["status"]}
+    if product["status"] == "sold":
+        listed_at = stored.get("last_relisted") or stored.get("created_at") or timestamp
+        return product_event("sold", user_id, current, timestamp, listed_at=listed_at, **fields)
+    return product_event("status_changed", user_id, current, timestamp, **fields)
+
+async def upsert_products(products: List[VintedProduct], user_id: str, on_result: ResultCallback = None) -> Dict[str, int]:
+    """Upsert products in one unordered bulk write and count imported, updated and failed items"""
+    if not products:
+        return {"imported": 0, "updated": 0, "failed": 0}
+    
+    operations = []
+    vinted_ids = []
+    product_docs = []
+    for product in products:
+        product = product.dict()
+        product_docs.append(product)
+        operations.append(UpdateOne(
+            {"vinted_id": product["vinted_id"], "user_id": user_id},
+            {
+                "$set": {field: product[field] for field in IMPORT_MUTABLE_FIELDS},
+                "$setOnInsert": {k: v for k, v in product.items() if k not in IMPORT_MUTABLE_FIELDS}
+            },
+            upsert=True
+        ))
+        vinted_ids.append(product["vinted_id"])
+    
+    # The values user_stats and events depend on, to work out what each write changes
+    stored_docs = {
+        stored["vinted_id"]: stored
+        async for stored in db.products.find(
+            {"user_id": user_id, "vinted_id": {"$in": vinted_ids}},
+            {"_id": 0, "id": 1, "vinted_id": 1, "title": 1, "status": 1, "price": 1, "views": 1, "last_relisted": 1, "created_at": 1}
+        )
+    }
+    
+    write_errors: Dict[int, str] = {}
+    try:
+        result = await db.products.bulk_write(operations, ordered=False)
+        imported_count = result.upserted_count
+        updated_count = result.matched_count
+        upserted_indexes = set(result.upserted_ids)
+    except BulkWriteError as e:
+        details = e.details
+        for error in details.get("writeErrors", []):
+            logging.error(f"Error importing product {vinted_ids[error['index']]}: {error.get('errmsg')}")
+            write_errors[error["index"]] = error.get("errmsg", "")
+        imported_count = details.get("nUpserted", 0)
+        updated_count = details.get("nMatched", 0)
+        upserted_indexes = {upserted["index"] for upserted in details.get("upserted", [])}
+    
+    now = datetime.utcnow()
+    stats_inc: Dict[str, Any] = {}
+    events: List[dict] = []
+    for index, product in enumerate(product_docs):
+        stored = stored_docs.get(product["vinted_id"])
+        if index in upserted_indexes:
+            merge_stats_deltas(stats_inc, product_stats_delta(None, product))
+            events.append(product_event("imported", user_id, product, now))
+        elif index not in write_errors and stored:
+            merge_stats_deltas(stats_inc, product_stats_delta(stored, product))
+            if stored.get("status") != product["status"]:
+                event = product_status_event(user_id, stored, product, now)
+                if event["meta"]["type"] == "sold":
+                    merge_stats_deltas(stats_inc, {"sales": 1, "sale_days_total": sale_days(event)})
+                events.append(event)
+    await user_stats.apply(user_id, inc=stats_inc)
+    await product_versions.bump(user_id)
+    await event_log.record(events)
+    
+    if on_result:
+        for index, vinted_id in enumerate(vinted_ids):
+            if index in write_errors:
+                await on_result({"vinted_id": vinted_id, "success": False, "error": write_errors[index]})
+            else:
+                action = "imported" if index in upserted_indexes else "updated"
+                await on_result({"vinted_id": vinted_id, "success": True, "action": action})
+    
+    ITEMS_IMPORTED.labels("imported").inc(imported_count)
+    ITEMS_IMPORTED.labels("updated").inc(updated_count)
+    ITEMS_IMPORTED.labels("failed").inc(len(write_errors))
+    return {"imported": imported_count, "updated": updated_count, "failed": len(write_errors)}
+
+# Incremental sync
+SYNC_FULL_INTERVAL_HOURS = float(os.environ.get('SYNC_FULL_INTERVAL_HOURS', 24))
+
+async def changed_products(products: List[VintedProduct], user_id: str) -> List[VintedProduct]:
+    """Products that are new or whose content hash or status differs from the stored one"""
+    stored = await db.products.find(
+        {"user_id": user_id, "vinted_id": {"$in": [p.vinted_id for p in products]}},
+        {"_id": 0, "vinted_id": 1, "content_hash": 1, "status": 1}
+    ).to_list(None)
+    # Status is compared on its own because marking a product deleted leaves its hash as it was,
+    # so an item that reappears in the wardrobe would otherwise look unchanged
+    stored_state = {doc["vinted_id"]: (doc.get("content_hash"), doc.get("status")) for doc in stored}
+    return [p for p in products if stored_state.get(p.vinted_id) != (p.content_hash, p.status)]
+
+async def sync_wardrobe(
+    vinted_client: VintedClient,
+    vinted_user_id: str,
+    user_id: str,
+    mode: str = "auto",
+    on_result: ResultCallback = None
+) -> Dict[str, Any]:
+    """
+    Bring a user's products in line with their Vinted wardrobe, writing only changed items.
+    
+    "full" walks every page; "incremental" walks newest-first and stops at the first page with
+    no changes; "auto" runs a full sync when none has completed in SYNC_FULL_INTERVAL_HOURS.
+    Products missing from a completely walked wardrobe are marked deleted.
+    """
+    state = await db.sync_state.find_one({"user_id": user_id}) or {}
+    if mode == "auto":
+        last_full_sync = state.get("last_full_sync_at")
+        full_due = (
+            state.get("vinted_user_id") != vinted_user_id
+            or last_full_sync is None
+            or last_full_sync < datetime.utcnow() - timedelta(hours=SYNC_FULL_INTERVAL_HOURS)
+        )
+        mode = "full" if full_due else "incremental"
+    
+    started_at = datetime.utcnow()
+    products: List[VintedProduct] = []
+    changed: List[VintedProduct] = []
+    # Every item id seen in the wardrobe, including items that failed to transform
+    fetched_ids: set = set()
+    failed_count = 0
+    failed_pages: List[int] = []
+    
+    if mode == "full":
+        wardrobe_data = await vinted_client.get_full_wardrobe(vinted_user_id)
+        failed_pages = wardrobe_data["failed_pages"]
+        fetched_ids = {str(item.get("id", "")) for item in wardrobe_data["items"]}
+        products, failed_count = await transform_wardrobe_items(wardrobe_data["items"], user_id, on_result)
+        changed = await changed_products(products, user_id)
+        complete = not failed_pages
+    else:
+        page = 1
+        while True:
+            page_data = await vinted_client.get_user_wardrobe(vinted_user_id, page=page, per_page=WARDROBE_PAGE_SIZE, order="newest_first")
+            page_items = [item for item in page_data.get("items") or [] if str(item.get("id", "")) not in fetched_ids]
+            fetched_ids.update(str(item.get("id", "")) for item in page_items)
+            page_products, page_failed = await transform_wardrobe_items(page_items, user_id, on_result)
+            page_changed = await changed_products(page_products, user_id)
+            products += page_products
+            changed += page_changed
+            failed_count += page_failed
+            
+            total_pages = int((page_data.get("pagination") or {}).get("total_pages") or 1)
+            complete = page >= total_pages
+            if complete or not page_changed:
+                break
+            page += 1
+    
+    result = await upsert_products(changed, user_id, on_result)
+    result["failed"] += failed_count
+    result["unchanged"] = len(products) - len(changed)
+    result["total"] = len(products) + failed_count
+    if on_result:
+        changed_ids = {p.vinted_id for p in changed}
+        for product in products:
+            if product.vinted_id not in changed_ids:
+                await on_result({"vinted_id": product.vinted_id, "success": True, "action": "unchanged"})
+    
+    result["removed"] = 0
+    if complete:
+        missing = await db.products.find(
+            {"user_id": user_id, "status": "active", "vinted_id": {"$nin": list(fetched_ids)}},
+            {"_id": 0, "id": 1, "vinted_id": 1, "title": 1, "price": 1, "views": 1}
+        ).to_list(None)
+        if missing:
+            now = datetime.utcnow()
+            removed = await db.products.update_many(
+                {"user_id": user_id, "status": "active", "id": {"$in": [p["id"] for p in missing]}},
+                {"$set": {"status": "deleted", "updated_at": now}}
+            )
+            result["removed"] = removed.modified_count
+            await user_stats.apply(user_id, inc={
+                "status_counts.active": -removed.modified_count,
+                "status_counts.deleted": removed.modified_count
+            })
+            await product_versions.bump(user_id)
+            await event_log.record([product_event("removed", user_id, product, now) for product in missing])
+    
+    state_update: Dict[str, Any] = {"vinted_user_id": vinted_user_id, "last_sync_at": started_at, "last_mode": mode}
+    if complete:
+        state_update["last_full_sync_at"] = started_at
+    await db.sync_state.update_one({"user_id": user_id}, {"$set": state_update}, upsert=True)
+    
+    result.update({"mode": mode, "failed_pages": failed_pages})
+    return result
+
+# Batch sync across every account
+BATCH_SYNC_CONCURRENCY = int(os.environ.get('BATCH_SYNC_CONCURRENCY', 8))
+
+async def batch_sync_accounts() -> List[Dict[str, Any]]:
+    """Accounts with a known Vinted wardrobe, least recently synced first so every account gets its turn"""
+    states = await db.sync_state.find(
+        {"vinted_user_id": {"$ne": None}}, {"_id": 0, "user_id": 1, "vinted_user_id": 1}
+    ).sort("last_sync_at", ASCENDING).to_list(None)
+    user_docs = {
+        user_doc["id"]: user_doc
+        async for user_doc in db.users.find(
+            {"id": {"$in": [state["user_id"] for state in states]}},
+            {"_id": 0, "id": 1, "csrf_token": 1, "auth_token": 1}
+        )
+    }
+    return [
+        {**state, "csrf_token": user_docs[state["user_id"]]["csrf_token"], "auth_token": user_docs[state["user_id"]]["auth_token"]}
+        for state in states if state["user_id"] in user_docs
+    ]
+
+async def sync_accounts(
+    accounts: List[Dict[str, Any]],
+    mode: str = "auto",
+    concurrency: int = BATCH_SYNC_CONCURRENCY,
+    on_result: ResultCallback = None
+) -> Dict[str, int]:
+    """
+    Sync many accounts on a bounded pool of workers. Each worker takes one account at a time, so a
+    large wardrobe never holds more than one worker, and the rate governor keeps a per-account budget.
+    A failing account is recorded and the rest carry on.
+    """
+    queue: asyncio.Queue = asyncio.Queue()
+    for account in accounts:
+        queue.put_nowait(account)
+    totals = {"accounts": len(accounts), "succeeded": 0, "failed": 0, "imported": 0, "updated": 0, "removed": 0}
+
+    async def sync_account(account: Dict[str, Any]) -> Dict[str, Any]:
+        try:
+            vinted_client = VintedClient(account["csrf_token"], account["auth_token"])
+            result = await sync_wardrobe(vinted_client, account["vinted_user_id"], account["user_id"], mode=mode)
+        except Exception as e:
+            detail = e.detail if isinstance(e, HTTPException) else str(e)
+            logging.error(f"Error syncing account {account['user_id']}: {detail}")
+            return {"user_id": account["user_id"], "success": False, "error": detail}
+        return {
+            "user_id": account["user_id"],
+            "success": True,
+            "mode": result["mode"],
+            "imported": result["imported"],
+            "updated": result["updated"],
+            "unchanged": result["unchanged"],
+            "removed": result["removed"],
+            "failed_items": result["failed"]
+        }
+
+    async def worker():
+        while not queue.empty():
+            result = await sync_account(queue.get_nowait())
+            totals["succeeded" if result["success"] else "failed"] += 1
+            for field in ("imported", "updated", "removed"):
+                totals[field] += result.get(field, 0)
+            if on_result:
+                await on_result(result)
+
+    await asyncio.gather(*(worker() for _ in range(min(concurrency, len(accounts)))))
+    return totals
+
+def dashboard_stats_pipeline(user_id: str) -> List[dict]:
+    """Single-pass aggregation over a user's products: counts and sums per status and the latest relists"""
+    return [
+        {"$match": {"user_id": user_id}},
+        {"$facet": {
+            "by_status": [{"$group": {
+                "_id": "$status",
+                "count": {"$sum": 1},
+                "revenue": {"$sum": {"$ifNull": ["$price", 0]}},
+                "views": {"$sum": {"$ifNull": ["$views", 0]}}
+            }}],
+            "recent_relisted": [
+                {"$match": {"last_relisted": {"$ne": None}}},
+                {"$sort": {"last_relisted": -1}},
+                {"$limit": RECENT_ACTIVITY_LIMIT},
+                {"$project": {"_id": 0, "title": 1, "last_relisted": 1}}
+            ]
+        }}
+    ]
+
+# Precomputed dashboard stats, kept up to date by the import, sync and relist write paths
+RECENT_ACTIVITY_LIMIT = 5
+USER_STATS_REBUILD_HOURS = float(os.environ.get('USER_STATS_REBUILD_HOURS', 24))
+USER_STATS_RECONCILE_SECONDS = float(os.environ.get('USER_STATS_RECONCILE_SECONDS', 3600))
+USER_STATS_FIELDS = (
+    "total_products", "total_views", "total_revenue", "status_counts", "recent_activity", "sales", "sale_days_total"
+)
+
+def product_stats_delta(old: Optional[dict], new: Optional[dict]) -> Dict[str, Any]:
+    """The user_stats $inc for a product changing from `old` to `new`; None means the product is absent"""
+    inc: Dict[str, Any] = {}
+    for doc, sign in ((old, -1), (new, 1)):
+        if not doc:
+            continue
+        status = doc.get("status") or "active"
+        for field, amount in (
+            ("total_products", 1),
+            (f"status_counts.{status}", 1),
+            ("total_views", doc.get("views") or 0),
+            ("total_revenue", (doc.get("price") or 0) if status == "sold" else 0)
+        ):
+            inc[field] = inc.get(field, 0) + sign * amount
+    return {field: amount for field, amount in inc.items() if amount}
+
+def merge_stats_deltas(total: Dict[str, Any], delta: Dict[str, Any]):
+    for field, amount in delta.items():
+        total[field] = total.get(field, 0) + amount
+
+class UserStatsStore:
+    """
+    One user_stats document per user, updated with $inc/$push as products are written so dashboard
+    reads are a single lookup. Updates never create the document: a missing one is rebuilt from
+    products on first read, and a periodic rebuild corrects any drift.
+    """
+
+    async def apply(self, user_id: str, inc: Optional[Dict[str, Any]] = None, activity: Optional[List[dict]] = None):
+        update: Dict[str, Any] = {}
+        if inc:
+            update["$inc"] = inc
+        if activity:
+            update["$push"] = {"recent_activity": {
+                "$each": activity, "$sort": {"timestamp": -1}, "$slice": RECENT_ACTIVITY_LIMIT
+            }}
+        if update:
+            update["$set"] = {"updated_at": datetime.utcnow()}
+            await db.user_stats.update_one({"user_id": user_id}, update)
+
+    async def get(self, user_id: str) -> dict:
+        stats_doc = await db.user_stats.find_one({"user_id": user_id}, {"_id": 0})
+        return stats_doc or await self.rebuild(user_id)
+
+    async def rebuild(self, user_id: str) -> dict:
+        """Recompute the document from products; cached dashboard responses are invalidated if it had drifted"""
+        facets = (await db.products.aggregate(dashboard_stats_pipeline(user_id)).to_list(1))[0]
+        by_status = {group["_id"] or "active": group for group in facets["by_status"]}
+        sales = await db.events.aggregate([
+            {"$match": {"meta.user_id": user_id, "meta.type": "sold"}},
+            {"$group": {
+                "_id": None,
+                "count": {"$sum": 1},
+                "days": {"$sum": {"$divide": [{"$subtract": ["$timestamp", "$listed_at"]}, 86400000]}}
+            }}
+        ]).to_list(1)
+        now = datetime.utcnow()
+        stats_doc = {
+            "user_id": user_id,
+            "total_products": sum(group["count"] for group in by_status.values()),
+            "total_views": sum(group["views"] for group in by_status.values()),
+            "total_revenue": by_status["sold"]["revenue"] if "sold" in by_status else 0,
+            "status_counts": {status: group["count"] for status, group in by_status.items()},
+            "recent_activity": [
+                {"action": "relisted", "product_title": product.get("title", ""), "timestamp": product["last_relisted"]}
+                for product in facets["recent_relisted"]
+            ],
+            "sales": sales[0]["count"] if sales else 0,
+            "sale_days_total": sales[0]["days"] if sales else 0,
+            "updated_at": now,
+            "rebuilt_at": now
+        }
+        previous = await db.user_stats.find_one_and_replace(
+            {"user_id": user_id}, stats_doc, upsert=True, projection={"_id": 0}
+        )
+        if previous and any(previous.get(field) != stats_doc[field] for field in USER_STATS_FIELDS if field != "sale_days_total"):
+            logging.warning(f"Rebuilt drifted dashboard stats for user {user_id}")
+            await product_versions.bump(user_id)
+        return stats_doc
+
+    async def run(self):
+        while True:
+            try:
+                await self.reconcile()
+            except Exception as e:
+                logging.error(f"Error reconciling user stats: {str(e)}")
+            await asyncio.sleep(USER_STATS_RECONCILE_SECONDS)
+
+    async def reconcile(self):
+        """Rebuild every stats document not rebuilt in the last USER_STATS_REBUILD_HOURS"""
+        stale = datetime.utcnow() - timedelta(hours=USER_STATS_REBUILD_HOURS)
+        async for stats_doc in db.user_stats.find({"rebuilt_at": {"$lt": stale}}, {"user_id": 1, "rebuilt_at": 1}):
+            # Claim the document so other worker processes skip it
+            claimed = await db.user_stats.find_one_and_update(
+                {"user_id": stats_doc["user_id"], "rebuilt_at": stats_doc["rebuilt_at"]},
+                {"$set": {"rebuilt_at": datetime.utcnow()}}
+            )
+            if not claimed:
+                continue
+            try:
+                await self.rebuild(stats_doc["user_id"])
+            except Exception as e:
+                logging.error(f"Could not rebuild stats for user {stats_doc['user_id']}: {str(e)}")
+
+user_stats = UserStatsStore()
+user_stats_reconciler: Optional[asyncio.Task] = None
+
+# Append-only activity history, kept in a MongoDB time-series collection
+EVENTS_RETENTION_DAYS = float(os.environ.get('EVENTS_RETENTION_DAYS', 0))  # 0 keeps events forever
+ANALYTICS_BUCKET_FORMATS = {"day": "%Y-%m-%d", "week": "%G-W%V", "month": "%Y-%m"}
+
+def product_event(event_type: str, user_id: str, product_doc: dict, timestamp: datetime, **fields) -> dict:
+    return {
+        "timestamp": timestamp,
+        "meta": {"user_id": user_id, "type": event_type},
+        "product_id": product_doc["id"],
+        "vinted_id": product_doc.get("vinted_id"),
+        "title": product_doc.get("title", ""),
+        "price": product_doc.get("price", 0),
+        "views": product_doc.get("views", 0),
+        **fields
+    }
+
+def sale_days(event: dict) -> float:
+    return (event["timestamp"] - event["listed_at"]).total_seconds() / 86400
+
+class EventLog:
+    """Imported, relisted, sold, removed and status_changed events per product, written in batches"""
+
+    async def ensure_collection(self):
+        """Create the events time-series collection; servers without time-series get a plain collection"""
+        options: Dict[str, Any] = {"timeseries": {"timeField": "timestamp", "metaField": "meta", "granularity": "hours"}}
+        if EVENTS_RETENTION_DAYS:
+            options["expireAfterSeconds"] = int(EVENTS_RETENTION_DAYS * 86400)
+        try:
+            await db.create_collection("events", **options)
+            logger.info("Created events time-series collection")
+        except CollectionInvalid:
+            pass
+        except Exception as e:
+            logger.warning(f"Could not create events as a time-series collection, using a regular one: {str(e)}")
+
+    async def record(self, events: List[dict]):
+        """Analytics must never fail an import or relist, so write errors are only logged"""
+        if not events:
+            return
+        try:
+            await db.events.insert_many(events, ordered=False)
+        except Exception as e:
+            logging.error(f"Error recording {len(events)} events: {str(e)}")
+
+    async def recent(self, user_id: str, limit: int, event_type: Optional[str] = None,
+                     before: Optional[datetime] = None) -> List[dict]:
+        query: Dict[str, Any] = {"meta.user_id": user_id}
+        if event_type:
+            query["meta.type"] = event_type
+        if before:
+            query["timestamp"] = {"$lt": before}
+        return await db.events.find(query, {"_id": 0}).sort("timestamp", DESCENDING).limit(limit).to_list(limit)
+
+event_log = EventLog()
+
+def analytics_series_pipeline(user_id: str, event_type: str, since: datetime, bucket: str, value: dict) -> List[dict]:
+    """Average and count of `value` over one event type, overall and per period"""
+    return [
+        {"$match": {"meta.user_id": user_id, "meta.type": event_type, "timestamp": {"$gte": since}}},
+        {"$project": {
+            "period": {"$dateToString": {"date": "$timestamp", "format": ANALYTICS_BUCKET_FORMATS[bucket]}},
+            "value": value
+        }},
+        {"$match": {"value": {"$ne": None}}},
+        {"$facet": {
+            "overall": [{"$group": {"_id": None, "avg": {"$avg": "$value"}, "count": {"$sum": 1}}}],
+            "series": [
+                {"$group": {"_id": "$period", "avg": {"$avg": "$value"}, "count": {"$sum": 1}}},
+                {"$sort": {"_id": 1}}
+            ]
+        }}
+    ]
+
+def analytics_activity_pipeline(user_id: str, since: datetime, bucket: str) -> List[dict]:
+    return [
+        {"$match": {
+            "meta.user_id": user_id,
+            "meta.type": {"$in": ["imported", "relisted", "sold", "removed"]},
+            "timestamp": {"$gte": since}
+        }},
+        {"$group": {
+            "_id": {
+                "period": {"$dateToString": {"date": "$timestamp", "format": ANALYTICS_BUCKET_FORMATS[bucket]}},
+                "type": "$meta.type"
+            },
+            "count": {"$sum": 1}
+        }},
+        {"$sort": {"_id.period": 1}}
+    ]
+
+async def compute_analytics(user_id: str, days: int, bucket: str) -> Dict[str, Any]:
+    since = datetime.utcnow() - timedelta(days=days)
+    sale_days_expr = {"$divide": [{"$subtract": ["$timestamp", "$listed_at"]}, 86400000]}
+    time_to_sale, views_per_relist, activity = await asyncio.gather(
+        db.events.aggregate(analytics_series_pipeline(user_id, "sold", since, bucket, sale_days_expr)).to_list(1),
+        db.events.aggregate(analytics_series_pipeline(user_id, "relisted", since, bucket, "$views_gained")).to_list(1),
+        db.events.aggregate(analytics_activity_pipeline(user_id, since, bucket)).to_list(None)
+    )
+
+    def summarize(facets: List[dict], avg_name: str, count_name: str) -> Dict[str, Any]:
+        overall = facets[0]["overall"][0] if facets and facets[0]["overall"] else {"avg": None, "count": 0}
+        return {
+            avg_name: round(overall["avg"], 2) if overall["avg"] is not None else None,
+            count_name: overall["count"],
+            "series": [
+                {"period": point["_id"], avg_name: round(point["avg"], 2), count_name: point["count"]}
+                for point in (facets[0]["series"] if facets else [])
+            ]
+        }
+
+    periods: Dict[str, Dict[str, Any]] = {}
+    for point in activity:
+        period = periods.setdefault(point["_id"]["period"], {"period": point["_id"]["period"]})
+        period[point["_id"]["type"]] = point["count"]
+    return {
+        "since": since,
+        "bucket": bucket,
+        "time_to_sale": summarize(time_to_sale, "avg_days", "sales"),
+        "views_per_relist": summarize(views_per_relist, "avg_views", "relists"),
+        "activity": list(periods.values())
+    }
+
+async def compute_dashboard_stats(user_id: str) -> DashboardStats:
+    stats_doc = await user_stats.get(user_id)
+    status_counts = stats_doc.get("status_counts") or {}
+    
+    # Days from listing (or the latest relist) to sale, averaged over every sale recorded in events
+    sales = stats_doc.get("sales") or 0
+    avg_sale_time = round(stats_doc.get("sale_days_total", 0) / sales) if sales else 0
+    
+    recent_activity = [
+        {**activity, "timestamp": activity["timestamp"].isoformat()}
+        for activity in stats_doc.get("recent_activity") or []
+    ]
+    
+    return DashboardStats(
+        total_products=stats_doc.get("total_products", 0),
+        active_products=status_counts.get("active", 0),
+        sold_products=status_counts.get("sold", 0),
+        total_revenue=stats_doc.get("total_revenue", 0),
+        total_views=stats_doc.get("total_views", 0),
+        avg_sale_time=avg_sale_time,
+        recent_activity=recent_activity
     )
 
+# Photo re-upload pipeline
+PHOTO_CACHE_DIR = Path(os.environ.get('PHOTO_CACHE_DIR', ROOT_DIR / 'photo_cache'))
+PHOTO_UPLOAD_CONCURRENCY = int(os.environ.get('PHOTO_UPLOAD_CONCURRENCY', 4))
+PHOTO_CACHE_MAX_BYTES = int(os.environ.get('PHOTO_CACHE_MAX_BYTES', 2 * 1024 ** 3))
+PHOTO_CACHE_MAX_AGE_DAYS = float(os.environ.get('PHOTO_CACHE_MAX_AGE_DAYS', 30))
+PHOTO_CACHE_EVICT_INTERVAL_SECONDS = float(os.environ.get('PHOTO_CACHE_EVICT_INTERVAL_SECONDS', 300))
+
+class PhotoCache:
+    """
+    Content-addressed on-disk photo cache with a URL index, so no photo is downloaded twice.
+    Files are touched when used; after downloads, photos unused for PHOTO_CACHE_MAX_AGE_DAYS and
+    then the least recently used ones beyond PHOTO_CACHE_MAX_BYTES are evicted. Disk access runs
+    in worker threads so it never blocks the event loop.
+    """
+
+    def __init__(self, root: Path, max_bytes: int = PHOTO_CACHE_MAX_BYTES, max_age_days: float = PHOTO_CACHE_MAX_AGE_DAYS):
+        self.objects_dir = root / "objects"
+        self.urls_dir = root / "urls"
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_days * 86400
+        self._downloads: Dict[str, asyncio.Task] = {}
+        self._evicted_at = 0.0
+        self._eviction: Optional[asyncio.Task] = None
+
+    def _url_index(self, url: str) -> Path:
+        return self.urls_dir / hashlib.sha1(url.encode()).hexdigest()
+
+    def lookup(self, url: str) -> Optional[Path]:
+        """Blocking; the cached photo for a URL, marked as recently used"""
+        index = self._url_index(url)
+        try:
+            path = self.objects_dir / index.read_text().strip()
+            os.utime(path)
+            os.utime(index)
+        except FileNotFoundError:
+            return None
+        return path
+
+    async def fetch(self, url: str, client: httpx.AsyncClient) -> Path:
+        path = await asyncio.to_thread(self.lookup, url)
+        if path:
+            return path
+        # Concurrent requests for the same URL share one download
+        download = self._downloads.get(url)
+        if download is None:
+            download = self._downloads[url] = asyncio.create_task(self._download(url, client))
+            download.add_done_callback(lambda _: self._downloads.pop(url, None))
+        return await asyncio.shield(download)
+
+    def _open_temp(self):
+        self.objects_dir.mkdir(parents=True, exist_ok=True)
+        self.urls_dir.mkdir(parents=True, exist_ok=True)
+        return tempfile.NamedTemporaryFile(dir=self.objects_dir, prefix=".download-", delete=False)
+
+    def _discard(self, tmp):
+        tmp.close()
+        os.unlink(tmp.name)
+
+    def _store(self, tmp, url: str, digest: str) -> Path:
+        tmp.close()
+        path = self.objects_dir / digest
+        os.replace(tmp.name, path)
+        index_tmp = self._url_index(url).with_suffix(".tmp")
+        index_tmp.write_text(path.name)
+        os.replace(index_tmp, self._url_index(url))
+        return path
+
+    async def _download(self, url: str, client: httpx.AsyncClient) -> Path:
+        tmp = await asyncio.to_thread(self._open_temp)
+        digest = hashlib.sha256()
+        # Stream to a temporary file while hashing; the content hash names the final file
+        try:
+            async with client.stream("GET", url) as response:
+                response.raise_for_status()
+                async for chunk in response.aiter_bytes():
+                    digest.update(chunk)
+                    await asyncio.to_thread(tmp.write, chunk)
+        except BaseException:
+            await asyncio.to_thread(self._discard, tmp)
+            raise
+        path = await asyncio.to_thread(self._store, tmp, url, digest.hexdigest())
+        self._schedule_eviction()
+        return path
+
+    def _schedule_eviction(self):
+        """Evict in the background at most once every PHOTO_CACHE_EVICT_INTERVAL_SECONDS"""
+        now = time.monotonic()
+        if (self._eviction and not self._eviction.done()) or now - self._evicted_at < PHOTO_CACHE_EVICT_INTERVAL_SECONDS:
+            return
+        self._evicted_at = now
+        self._eviction = asyncio.create_task(asyncio.to_thread(self.evict))
+
+    def evict(self) -> int:
+        """Blocking; remove expired and least recently used photos and return how many were removed"""
+        expired_before = time.time() - self.max_age_seconds
+        files = []
+        for directory in (self.objects_dir, self.urls_dir):
+            if directory.is_dir():
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        if entry.is_file():
+                            stat = entry.stat()
+                            files.append((stat.st_mtime, stat.st_size, Path(entry.path), directory))
+        files.sort()
+        total = sum(size for _, size, _, directory in files if directory == self.objects_dir)
+        removed = 0
+        for mtime, size, path, directory in files:
+            # URL index entries and downloads in progress only go by age; an index entry whose
+            # photo is gone is just a cache miss
+            over_size = directory == self.objects_dir and not path.name.startswith(".") and total > self.max_bytes
+            if mtime >= expired_before and not over_size:
+                continue
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                continue
+            if directory == self.objects_dir:
+                total -= size
+                removed += 1
+        if removed:
+            logging.info(f"Evicted {removed} photos from the photo cache")
+        return removed
+
+class PhotoPipeline:
+    """Downloads a product's photos through the cache and uploads them to a new listing in parallel"""
+
+    def __init__(self, cache: PhotoCache, concurrency: int = PHOTO_UPLOAD_CONCURRENCY):
+        self.cache = cache
+        self.concurrency = concurrency
+
+    async def upload_photos(self, vinted_client: VintedClient, photo_urls: List[str], temp_uuid: str) -> List[Dict[str, Any]]:
+        """Upload photos for the listing being created under temp_uuid and return its assigned_photos"""
+        semaphore = asyncio.Semaphore(self.concurrency)
+        download_client = (vinted_client.transport or get_vinted_transport()).download_client()
+
+        async def upload(url: str) -> Dict[str, Any]:
+            async with semaphore:
+                path = await self.cache.fetch(url, download_client)
+                photo = await vinted_client.upload_photo(path, temp_uuid)
+                return {"id": photo["id"], "orientation": 0}
+
+        # gather keeps the photos in their original order
+        return list(await asyncio.gather(*(upload(url) for url in photo_urls)))
+
+photo_pipeline = PhotoPipeline(PhotoCache(PHOTO_CACHE_DIR))
+
+# Relist log states that still need work: the listing may exist but the product doesn't point at it yet
+RELIST_LOG_UNFINISHED_STATES = ["creating", "created", "deleted", "delete_failed"]
+
+class RelistLog:
+    """
+    Log of every relist, so one interrupted after Vinted created the new listing is finished rather
+    than listed again. Each item moves through creating -> created -> completed; with delete_original
+    the old listing is deleted after created (deleted, or delete_failed) before completing. A resumed
+    relist of the product, or reconciliation on restart, finishes an interrupted entry. An entry
+    that still fails after RELIST_LOG_MAX_ATTEMPTS reconciliations is marked abandoned.
+    """
+
+    async def begin(self, user_id: str, product_doc: dict, delete_original: bool) -> str:
+        entry_id = str(uuid.uuid4())
+        now = datetime.utcnow()
+        await db.relist_log.insert_one({
+            "id": entry_id,
+            "user_id": user_id,
+            "product_id": product_doc["id"],
+            "old_vinted_id": product_doc["vinted_id"],
+            "new_vinted_id": None,
+            "delete_original": delete_original,
+            "state": "creating",
+            "product_updated": False,
+            "created_at": now,
+            "updated_at": now
+        })
+        return entry_id
+
+    async def mark(self, entry_id: str, state: str, **fields):
+        await db.relist_log.update_one(
+            {"id": entry_id},
+            {"$set": {"state": state, "updated_at": datetime.utcnow(), **fields}}
+        )
+
+    async def finalize(self, entry_id: str):
+        """Record that the product now points at its new listing"""
+        await db.relist_log.update_one(
+            {"id": entry_id},
+            {"$set": {"product_updated": True, "updated_at": datetime.utcnow()}}
+        )
+        await db.relist_log.update_one(
+            {"id": entry_id, "$or": [{"state": "deleted"}, {"state": "created", "delete_original": False}]},
+            {"$set": {"state": "completed"}}
+        )
+
+    async def _claim(self, entry: dict) -> bool:
+        """Claim an entry so other worker processes skip it"""
+        claimed = await db.relist_log.find_one_and_update(
+            {"id": entry["id"], "updated_at": entry["updated_at"]},
+            {"$set": {"updated_at": datetime.utcnow()}}
+        )
+        return claimed is not None
+
+    async def claim_interrupted(self, product_id: str) -> Optional[dict]:
+        """An earlier relist of the product that never updated it, claimed for the caller to finish"""
+        entry = await db.relist_log.find_one(
+            {"product_id": product_id, "state": {"$in": RELIST_LOG_UNFINISHED_STATES}, "product_updated": False},
+            {"_id": 0}
+        )
+        return entry if entry and await self._claim(entry) else None
+
+    async def run(self):
+        while True:
+            try:
+                await self.reconcile()
+            except Exception as e:
+                logging.error(f"Error reconciling relist log: {str(e)}")
+            await asyncio.sleep(RELIST_LOG_STALE_SECONDS)
+
+    async def reconcile(self):
+        """Finish relists interrupted by a crash or whose delete failed"""
+        stale = datetime.utcnow() - timedelta(seconds=RELIST_LOG_STALE_SECONDS)
+        async for entry in db.relist_log.find({"state": {"$in": RELIST_LOG_UNFINISHED_STATES}, "updated_at": {"$lt": stale}}):
+            if not await self._claim(entry):
+                continue
+            try:
+                await self.finish(entry)
+            except Exception as e:
+                detail = e.detail if isinstance(e, HTTPException) else str(e)
+                attempts = entry.get("attempts", 0) + 1
+                logging.error(f"Could not reconcile relist {entry['id']} of product {entry['product_id']} (attempt {attempts}): {detail}")
+                if attempts >= RELIST_LOG_MAX_ATTEMPTS:
+                    await self.mark(entry["id"], "abandoned", attempts=attempts, error=detail)
+                else:
+                    await db.relist_log.update_one({"id": entry["id"]}, {"$set": {"attempts": attempts, "error": detail}})
+
+    async def finish(self, entry: dict, vinted_client: Optional[VintedClient] = None) -> str:
+        """Complete an interrupted relist from its last recorded state and return the state it ends in"""
+        if entry["state"] == "creating":
+            # We cannot tell whether Vinted created the listing; the next wardrobe sync imports it if it did
+            logging.warning(f"Relist of product {entry['product_id']} was interrupted before the new listing was confirmed")
+            await self.mark(entry["id"], "abandoned")
+            return "abandoned"
+        # Entries written before plain relists were logged all deleted the original
+        delete_original = entry.get("delete_original", True)
+        # The new listing is live, so the product moves to it even if the old one can't be deleted
+        if not entry.get("product_updated"):
+            product_doc = await db.products.find_one({"id": entry["product_id"], "user_id": entry["user_id"]}, {"_id": 0})
+            if product_doc:
+                update = {"last_relisted": entry["updated_at"], "views_at_relist": product_doc.get("views", 0)}
+                if delete_original:
+                    update.update({"vinted_id": entry["new_vinted_id"], "views_at_relist": 0})
+                await record_relist(entry["user_id"], product_doc, update)
+            await db.relist_log.update_one({"id": entry["id"]}, {"$set": {"product_updated": True}})
+        if delete_original and entry["state"] in ("created", "delete_failed"):
+            if vinted_client is None:
+                user_doc = await db.users.find_one({"id": entry["user_id"]})
+                vinted_client = VintedClient(user_doc["csrf_token"], user_doc["auth_token"])
+            try:
+                await vinted_client.delete_product(entry["old_vinted_id"])
+            except HTTPException as e:
+                # Already gone from Vinted (deleted by hand, or removed once sold)
+                if e.status_code != 404:
+                    raise
+            await self.mark(entry["id"], "deleted")
+        await self.mark(entry["id"], "completed", product_updated=True)
+        return "completed"
+
+RELIST_LOG_STALE_SECONDS = float(os.environ.get('RELIST_LOG_STALE_SECONDS', 300))
+RELIST_LOG_MAX_ATTEMPTS = int(os.environ.get('RELIST_LOG_MAX_ATTEMPTS', 10))
+
+relist_log = RelistLog()
+relist_reconciler: Optional[asyncio.Task] = None
+
+RELIST_CONCURRENCY = int(os.environ.get('RELIST_CONCURRENCY', 5))
+
+# Per-product relist locks
+RELIST_LOCK_TTL_SECONDS = float(os.environ.get('RELIST_LOCK_TTL_SECONDS', 120))
+RELIST_RESULT_TTL_SECONDS = float(os.environ.get('RELIST_RESULT_TTL_SECONDS', 600))
+RELIST_LOCK_POLL_SECONDS = float(os.environ.get('RELIST_LOCK_POLL_SECONDS', 0.5))
+RELIST_LOCK_RENEW_SECONDS = float(os.environ.get('RELIST_LOCK_RENEW_SECONDS', RELIST_LOCK_TTL_SECONDS / 4))
+
+class RelistLocks:
+    """
+    One lock document per product in relist_locks, so concurrent or retried relists of a product
+    (double clicks, client retries, overlapping jobs) produce a single Vinted listing. The batch
+    holding a lock renews it every RELIST_LOCK_RENEW_SECONDS, so it only expires, RELIST_LOCK_TTL_SECONDS
+    later, once its holder has died; a successful relist keeps its result for RELIST_RESULT_TTL_SECONDS
+    and repeats within that window get the result instead of a new listing.
+    """
+
+    async def acquire(self, user_id: str, product_id: str, owner: str) -> Tuple[Optional[str], Optional[Dict[str, Any]]]:
+        """Return (token, None) once the caller may relist, or (None, result) to answer with instead"""
+        while True:
+            now = datetime.utcnow()
+            token = str(uuid.uuid4())
+            lock = {
+                "product_id": product_id,
+                "user_id": user_id,
+                "owner": owner,
+                "token": token,
+                "state": "in_progress",
+                "result": None,
+                "expires_at": now + timedelta(seconds=RELIST_LOCK_TTL_SECONDS)
+            }
+            try:
+                await db.relist_locks.insert_one(dict(lock))
+                return token, None
+            except DuplicateKeyError:
+                pass
+            # Take over a lock that has expired but not yet been removed by Mongo's TTL monitor,
+            # or one left behind by this owner's own interrupted attempt (a resumed job)
+            taken = await db.relist_locks.find_one_and_update(
+                {"product_id": product_id, "$or": [
+                    {"expires_at": {"$lt": now}},
+                    {"owner": owner, "state": "in_progress"}
+                ]},
+                {"$set": lock}
+            )
+            if taken:
+                return token, None
+            existing = await db.relist_locks.find_one({"product_id": product_id}, {"_id": 0, "state": 1, "result": 1})
+            if existing and existing["state"] == "done":
+                return None, existing["result"]
+            # Still being relisted; the holder keeps renewing the lock, or it expires and is taken over
+            await asyncio.sleep(RELIST_LOCK_POLL_SECONDS)
+
+    async def renew(self, held: Dict[str, str]):
+        """Push back the expiry of the in-progress locks in `held` (product_id -> token)"""
+        await db.relist_locks.update_many(
+            {"product_id": {"$in": list(held)}, "token": {"$in": list(held.values())}, "state": "in_progress"},
+            {"$set": {"expires_at": datetime.utcnow() + timedelta(seconds=RELIST_LOCK_TTL_SECONDS)}}
+        )
+
+    async def keep_alive(self, held: Dict[str, str]):
+        """Renew the locks a batch holds, including those still waiting for a relist slot, until cancelled"""
+        while True:
+            await asyncio.sleep(RELIST_LOCK_RENEW_SECONDS)
+            if not held:
+                continue
+            try:
+                await self.renew(dict(held))
+            except Exception as e:
+                logging.error(f"Error renewing relist locks: {str(e)}")
+
+    async def release(self, product_id: str, token: str, result: Dict[str, Any]):
+        if result["success"]:
+            await db.relist_locks.update_one(
+                {"product_id": product_id, "token": token},
+                {"$set": {
+                    "state": "done",
+                    "result": result,
+                    "expires_at": datetime.utcnow() + timedelta(seconds=RELIST_RESULT_TTL_SECONDS)
+                }}
+            )
+        else:
+            # Nothing was listed, so the next attempt may go straight ahead
+            await db.relist_locks.delete_one({"product_id": product_id, "token": token})
+
+relist_locks = RelistLocks()
+
+async def build_relist_data(product_doc: dict) -> dict:
+    """Map a stored product to the fields VintedClient.relist_product expects"""
+    relist_data = {
+        "title": product_doc.get("title", ""),
+        "description": product_doc.get("description", ""),
+        "price": product_doc.get("price", 0),
+        "currency": product_doc.get("currency", "GBP"),
+        "brand": product_doc.get("brand", ""),
+        # assigned_photos is filled in by the photo pipeline once the photos are re-uploaded
+        "assigned_photos": [],
+    }
+    for field in RELIST_ATTRIBUTE_FIELDS:
+        if product_doc.get(field) not in (None, []):
+            relist_data[field] = product_doc[field]
+    
+    # Products imported before ids were stored fall back to the lookup tables, then to relist_product's defaults
+    if "brand_id" not in relist_data:
+        brand_id = await vinted_lookups.resolve("brand", product_doc.get("brand"))
+        if brand_id:
+            relist_data["brand_id"] = brand_id
+    if "catalog_id" not in relist_data:
+        catalog_id = await vinted_lookups.resolve("catalog", product_doc.get("category"))
+        if catalog_id:
+            relist_data["catalog_id"] = catalog_id
+    return relist_data
+
+def relist_event(user_id: str, product_doc: dict, update: dict) -> dict:
+    """Relisted event; views_gained is what the previous listing earned since its own relist, when known"""
+    views_gained = None
+    if product_doc.get("views_at_relist") is not None:
+        views_gained = product_doc.get("views", 0) - product_doc["views_at_relist"]
+    return product_event(
+        "relisted", user_id, {**product_doc, **update}, update["last_relisted"],
+        previous_relisted_at=product_doc.get("last_relisted"), views_gained=views_gained
+    )
+
+async def record_relist(user_id: str, product_doc: dict, update: dict):
+    """Point a product at its new listing and record the relist in the stats and event log"""
+    await db.products.update_one({"id": product_doc["id"], "user_id": user_id}, {"$set": update})
+    await user_stats.apply(user_id, activity=[
+        {"action": "relisted", "product_title": product_doc.get("title", ""), "timestamp": update["last_relisted"]}
+    ])
+    await product_versions.bump(user_id)
+    await event_log.record([relist_event(user_id, product_doc, update)])
+
+async def relist_user_products(
+    vinted_client: VintedClient,
+    product_ids: List[str],
+    user_id: str,
+    on_result: Optional[Callable[[Dict[str, Any]], Awaitable[None]]] = None,
+    delete_original: bool = False,
+    lock_owner: Optional[str] = None
+) -> List[Dict[str, Any]]:
+    """
+    Relist products concurrently and return one result per requested id, in request order.
+    With delete_original the old listing is deleted once the new one exists, and the product
+    is moved to the new vinted_id; each step is recorded in the relist log. Each product is
+    relisted under its relist lock; `lock_owner` lets a resumed job take back its own locks.
+    """
+    lock_owner = lock_owner or str(uuid.uuid4())
+    unique_ids = list(dict.fromkeys(product_ids))
+    product_docs = await db.products.find({"id": {"$in": unique_ids}, "user_id": user_id}).to_list(None)
+    products_by_id = {doc["id"]: doc for doc in product_docs}
+    semaphore = asyncio.Semaphore(RELIST_CONCURRENCY)
+    held_locks: Dict[str, str] = {}  # product_id -> token, renewed by relist_locks.keep_alive
+
+    async def relist_one(product_id: str) -> Dict[str, Any]:
+        # One product's failure (e.g. a transient Mongo error) becomes its result instead of failing the batch
+        try:
+            result = await relist_product_doc(product_id)
+        except Exception as e:
+            logging.error(f"Error relisting product {product_id}: {str(e)}")
+            result = {"product_id": product_id, "success": False, "error": str(e)}
+        outcome = "coalesced" if result.get("coalesced") else "succeeded" if result["success"] else "failed"
+        ITEMS_RELISTED.labels(outcome).inc()
+        if on_result:
+            try:
+                await on_result(result)
+            except Exception as e:
+                logging.error(f"Error reporting relist of product {product_id}: {str(e)}")
+        return result
+
+    async def relist_product_doc(product_id: str) -> Dict[str, Any]:
+        product_doc = products_by_id.get(product_id)
+        if not product_doc:
+            return {"product_id": product_id, "success": False, "error": "Product not found"}
+        # Taken before the semaphore, so waiting on another relist of this product doesn't hold a slot
+        token, cached_result = await relist_locks.acquire(user_id, product_id, lock_owner)
+        if token is None:
+            return {**cached_result, "coalesced": True}
+        held_locks[product_id] = token
+        try:
+            # If this raises (e.g. cancellation) the lock is left to expire, in case the listing was created
+            result = await relist_locked(product_doc, temp_uuid=token)
+            await relist_locks.release(product_id, token, result)
+        finally:
+            del held_locks[product_id]
+        return result
+
+    async def relist_locked(product_doc: dict, temp_uuid: str) -> Dict[str, Any]:
+        product_id = product_doc["id"]
+        async with semaphore:
+            # A crashed or resumed relist may already have created the listing; finish that one instead
+            interrupted = await relist_log.claim_interrupted(product_id)
+            if interrupted:
+                return await finish_interrupted(interrupted)
+            log_entry_id = await relist_log.begin(user_id, product_doc, delete_original)
+            try:
+                relist_data = await build_relist_data(product_doc)
+                relist_data["assigned_photos"] = await photo_pipeline.upload_photos(
+                    vinted_client, product_doc.get("photos") or [], temp_uuid
+                )
+                relist_response = await vinted_client.relist_product(relist_data, temp_uuid=temp_uuid)
+            except Exception as e:
+                await relist_log.mark(log_entry_id, "failed", error=str(e))
+                return {"product_id": product_id, "success": False, "error": str(e)}
+            
+            try:
+                new_vinted_id = str(relist_response["item"]["id"])
+            except (KeyError, TypeError):
+                new_vinted_id = None
+            # Recorded before anything else, so a retry finishes this relist rather than listing the item again
+            await relist_log.mark(log_entry_id, "created", new_vinted_id=new_vinted_id)
+            # Baseline for the views the new listing gains before it is next relisted
+            update: Dict[str, Any] = {"last_relisted": datetime.utcnow(), "views_at_relist": product_doc.get("views", 0)}
+            result = {"product_id": product_id, "success": True, "vinted_response": relist_response}
+            if delete_original and new_vinted_id is None:
+                # The listing is live but we can't tell which it is, so the old one has to stay
+                error = f"Vinted did not return the new listing's id: {relist_response!r}"[:500]
+                logging.error(f"Relist of product {product_id}: {error}")
+                await relist_log.mark(log_entry_id, "abandoned", error=error)
+                result["deleted_original"] = False
+            elif delete_original:
+                try:
+                    await vinted_client.delete_product(product_doc["vinted_id"])
+                    await relist_log.mark(log_entry_id, "deleted")
+                    result["deleted_original"] = True
+                except Exception as e:
+                    # The new listing is live either way; reconciliation retries the delete later
+                    await relist_log.mark(log_entry_id, "delete_failed", error=str(e))
+                    result["deleted_original"] = False
+                update["vinted_id"] = new_vinted_id
+                # A replacement listing starts from zero views
+                update["views_at_relist"] = 0
+        # Written before the result is reported, so a resumed job that skips this product doesn't lose it
+        await record_relist(user_id, product_doc, update)
+        # Straight away, so reconciliation never picks up an entry of a batch that is still running
+        await relist_log.finalize(log_entry_id)
+        return result
+
+    async def finish_interrupted(entry: dict) -> Dict[str, Any]:
+        product_id = entry["product_id"]
+        try:
+            state = await relist_log.finish(entry, vinted_client)
+        except Exception as e:
+            finished = await db.relist_log.find_one({"id": entry["id"]}, {"product_updated": 1})
+            if not (finished and finished.get("product_updated")):
+                raise
+            # The product already points at the new listing; reconciliation keeps retrying the delete
+            detail = e.detail if isinstance(e, HTTPException) else str(e)
+            await relist_log.mark(entry["id"], "delete_failed", error=detail)
+            return {"product_id": product_id, "success": True, "resumed": True, "deleted_original": False}
+        if state == "abandoned":
+            return {
+                "product_id": product_id, "success": False,
+                "error": "An earlier relist was interrupted before Vinted confirmed it; check the wardrobe before retrying"
+            }
+        result = {"product_id": product_id, "success": True, "resumed": True}
+        if entry.get("delete_original", True):
+            result["deleted_original"] = True
+        return result
+
+    heartbeat = asyncio.create_task(relist_locks.keep_alive(held_locks))
+    try:
+        results = dict(zip(unique_ids, await asyncio.gather(*(relist_one(product_id) for product_id in unique_ids))))
+    finally:
+        heartbeat.cancel()
+    return [results[product_id] for product_id in product_ids]
+
+PRODUCT_SORT_FIELDS = {"updated_at", "created_at", "price", "views", "likes", "title"}
+PRODUCT_PAGE_MAX = 1000
+PRODUCT_STREAM_BATCH_SIZE = int(os.environ.get('PRODUCT_STREAM_BATCH_SIZE', 500))
+
+# Stored products are written from VintedProduct, so listings trust them instead of validating each one;
+# only fields added after a document was written need filling in
+PRODUCT_DEFAULTS = {
+    name: field.default for name, field in VintedProduct.model_fields.items()
+    if not field.is_required() and field.default_factory is None
+}
+
+class ProductListing:
+    """Filters, sort order, projection and keyset cursor for a page of GET /api/products"""
+
+    def __init__(self, user_id: str, cursor: Optional[str] = None, status: Optional[str] = None,
+                 brand: Optional[str] = None, min_price: Optional[float] = None, max_price: Optional[float] = None,
+                 sort: str = "-updated_at", fields: Optional[str] = None):
+        self.sort_field = sort.lstrip("-")
+        if self.sort_field not in PRODUCT_SORT_FIELDS:
+            raise HTTPException(status_code=400, detail=f"Cannot sort by {self.sort_field}")
+        self.direction = -1 if sort.startswith("-") else 1
+        # id breaks ties so the order, and therefore the cursor, is total
+        self.sort = [(self.sort_field, self.direction), ("id", self.direction)]
+        
+        self.fields = None
+        if fields:
+            self.fields = {field.strip() for field in fields.split(",") if field.strip()}
+            unknown = self.fields - set(VintedProduct.model_fields)
+            if unknown:
+                raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}")
+        
+        self.query: Dict[str, Any] = {"user_id": user_id}
+        if status:
+            self.query["status"] = status
+        if brand:
+            self.query["brand"] = brand
+        if min_price is not None or max_price is not None:
+            self.query["price"] = {}
+            if min_price is not None:
+                self.query["price"]["$gte"] = min_price
+            if max_price is not None:
+                self.query["price"]["$lte"] = max_price
+        if cursor:
+            value, last_id = self._decode_cursor(cursor)
+            op = "$lt" if self.direction == -1 else "$gt"
+            self.query["$or"] = [
+                {self.sort_field: {op: value}},
+                {self.sort_field: value, "id": {op: last_id}}
+            ]
+
+    @property
+    def projection(self) -> Dict[str, int]:
+        projection = {"_id": 0}
+        fields = self.fields | {"id", self.sort_field} if self.fields else VintedProduct.model_fields
+        projection.update({field: 1 for field in fields})
+        return projection
+
+    def serialize(self, product_doc: dict) -> dict:
+        return product_doc if self.fields else {**PRODUCT_DEFAULTS, **product_doc}
+
+    def next_cursor(self, last_doc: dict) -> str:
+        value = last_doc.get(self.sort_field)
+        if isinstance(value, datetime):
+            value = {"$date": value.isoformat()}
+        payload = json.dumps({"v": value, "id": last_doc["id"]})
+        return base64.urlsafe_b64encode(payload.encode()).decode()
+
+    def _decode_cursor(self, cursor: str):
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            value = payload["v"]
+            if isinstance(value, dict) and "$date" in value:
+                value = datetime.fromisoformat(value["$date"])
+            return value, payload["id"]
+        except Exception:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+
+# Background jobs
+JOB_WORKERS = int(os.environ.get('JOB_WORKERS', 4))
+JOB_HEARTBEAT_SECONDS = float(os.environ.get('JOB_HEARTBEAT_SECONDS', 10))
+JOB_LEASE_SECONDS = float(os.environ.get('JOB_LEASE_SECONDS', 60))
+
+class JobEvents:
+    """In-process fan-out of job progress events to server-sent event subscribers"""
+
+    def __init__(self, max_queued: int = 1000):
+        self.max_queued = max_queued
+        self._subscribers: Dict[str, set] = {}
+
+    def subscribe(self, job_id: str) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.max_queued)
+        self._subscribers.setdefault(job_id, set()).add(queue)
+        return queue
+
+    def unsubscribe(self, job_id: str, queue: asyncio.Queue):
+        subscribers = self._subscribers.get(job_id)
+        if subscribers:
+            subscribers.discard(queue)
+            if not subscribers:
+                del self._subscribers[job_id]
+
+    def publish(self, job_id: str, event: str, data: Dict[str, Any]):
+        for queue in self._subscribers.get(job_id, ()):
+            try:
+                queue.put_nowait((event, data))
+            except asyncio.QueueFull:
+                # A slow client misses item events but still gets totals with the next one
+                pass
+
+job_events = JobEvents()
+
+def job_totals(job_doc: dict) -> Dict[str, Any]:
+    return {key: job_doc.get(key, 0) for key in ("total", "processed", "succeeded", "failed")}
+
+class JobReporter:
+    """Persists the progress of a running job and publishes it to event subscribers"""
+
+    def __init__(self, job: Job):
+        self.job = job
+        self.totals = job_totals(job.dict())
+
+    async def set_total(self, total: int):
+        self.totals["total"] = total
+        await db.jobs.update_one(
+            {"id": self.job.id},
+            {"$set": {"total": total, "updated_at": datetime.utcnow()}}
+        )
+        job_events.publish(self.job.id, "progress", dict(self.totals))
+
+    def _count(self, result: Dict[str, Any]) -> str:
+        outcome = "succeeded" if result.get("success") else "failed"
+        self.totals["processed"] += 1
+        self.totals[outcome] += 1
+        job_events.publish(self.job.id, "item", {**result, "totals": dict(self.totals)})
+        return outcome
+
+    async def add_result(self, result: Dict[str, Any]):
+        """Record a relist result; these are kept on the job so a resumed job can skip them"""
+        outcome = self._count(result)
+        await db.jobs.update_one(
+            {"id": self.job.id},
+            {
+                "$push": {"results": result},
+                "$inc": {"processed": 1, outcome: 1},
+                "$set": {"updated_at": datetime.utcnow()}
+            }
+        )
+
+    async def add_item_event(self, result: Dict[str, Any]):
+        """Publish an import result; imports are idempotent so only the totals are persisted"""
+        self._count(result)
+
+    async def save_totals(self):
+        await db.jobs.update_one(
+            {"id": self.job.id},
+            {"$set": {**self.totals, "updated_at": datetime.utcnow()}}
+        )
+
+async def run_import_job(job: Job, reporter: JobReporter) -> Dict[str, Any]:
+    user_doc = await db.users.find_one({"id": job.user_id})
+    vinted_client = VintedClient(user_doc["csrf_token"], user_doc["auth_token"])
+    
+    result = await sync_wardrobe(
+        vinted_client,
+        job.params["vinted_user_id"],
+        job.user_id,
+        mode=job.params.get("mode", "auto"),
+        on_result=reporter.add_item_event
+    )
+    reporter.totals["total"] = result["total"]
+    await reporter.save_totals()
+    if not result["total"]:
+        return {"message": "No products found", "count": 0, **result}
+    return {"message": f"Imported {result['imported']} products", "count": result["imported"], **result}
+
+async def run_relist_job(job: Job, reporter: JobReporter) -> Dict[str, Any]:
+    user_doc = await db.users.find_one({"id": job.user_id})
+    vinted_client = VintedClient(user_doc["csrf_token"], user_doc["auth_token"])
+    product_ids = list(dict.fromkeys(job.params["product_ids"]))
+    await reporter.set_total(len(product_ids))
+    
+    # A resumed job skips the products it already reported on before the restart
+    done = {r["product_id"] for r in job.results}
+    remaining = [product_id for product_id in product_ids if product_id not in done]
+    await relist_user_products(
+        vinted_client, remaining, job.user_id,
+        on_result=reporter.add_result,
+        delete_original=job.params.get("delete_original", False),
+        lock_owner=job.id
+    )
+    
+    job_doc = await db.jobs.find_one({"id": job.id}, {"succeeded": 1})
+    return {"message": f"Relisted {job_doc['succeeded']}/{len(product_ids)} products"}
+
+JOB_HANDLERS: Dict[str, Callable[[Job, JobReporter], Awaitable[Dict[str, Any]]]] = {
+    "import": run_import_job,
+    "relist": run_relist_job,
+}
+
+class JobQueue:
+    """Worker pool running import/relist jobs in the event loop, with state kept in Mongo"""
+
+    def __init__(self, workers: int = JOB_WORKERS):
+        self.workers = workers
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self.tasks: List[asyncio.Task] = []
+
+    async def start(self):
+        self.tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        self.tasks.append(asyncio.create_task(self._sweep()))
+
+    async def stop(self):
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.tasks = []
+
+    async def submit(self, job: Job) -> Job:
+        await db.jobs.insert_one(job.dict())
+        await self.queue.put(job.id)
+        return job
+
+    def _claimable(self) -> dict:
+        # Queued jobs, or running jobs whose worker stopped heartbeating (e.g. after a restart)
+        stale = datetime.utcnow() - timedelta(seconds=JOB_LEASE_SECONDS)
+        return {"$or": [
+            {"status": "queued"},
+            {"status": "running", "heartbeat_at": {"$lt": stale}}
+        ]}
+
+    async def _sweep(self):
+        """Re-queue unfinished jobs left behind by a previous or crashed process"""
+        while True:
+            try:
+                async for job_doc in db.jobs.find(self._claimable(), {"id": 1}):
+                    await self.queue.put(job_doc["id"])
+            except Exception as e:
+                logging.error(f"Error sweeping unfinished jobs: {str(e)}")
+            await asyncio.sleep(JOB_LEASE_SECONDS)
+
+    async def _claim(self, job_id: str) -> Optional[Job]:
+        now = datetime.utcnow()
+        job_doc = await db.jobs.find_one_and_update(
+            {"id": job_id, **self._claimable()},
+            {"$set": {"status": "running", "started_at": now, "heartbeat_at": now, "updated_at": now}},
+            return_document=ReturnDocument.AFTER
+        )
+        return Job(**job_doc) if job_doc else None
+
+    async def _heartbeat(self, job_id: str):
+        while True:
+            await asyncio.sleep(JOB_HEARTBEAT_SECONDS)
+            await db.jobs.update_one({"id": job_id}, {"$set": {"heartbeat_at": datetime.utcnow()}})
+
+    async def _worker(self):
+        while True:
+            job_id = await self.queue.get()
+            try:
+                job = await self._claim(job_id)
+                if job:
+                    await self._run(job)
+            except Exception as e:
+                logging.error(f"Error running job {job_id}: {str(e)}")
+            finally:
+                self.queue.task_done()
+
+    async def _run(self, job: Job):
+        heartbeat = asyncio.create_task(self._heartbeat(job.id))
+        try:
+            result = await JOB_HANDLERS[job.type](job, JobReporter(job))
+            update = {"status": "completed", "result": result}
+        except Exception as e:
+            logging.error(f"Job {job.id} ({job.type}) failed: {str(e)}")
+            update = {"status": "failed", "error": str(e)}
+        finally:
+            heartbeat.cancel()
+        now = datetime.utcnow()
+        await db.jobs.update_one({"id": job.id}, {"$set": {**update, "finished_at": now, "updated_at": now}})
+        job_events.publish(job.id, "done", update)
+
+job_queue = JobQueue()
+
+# Scheduled auto-relist
+AUTO_RELIST_CONCURRENCY = int(os.environ.get('AUTO_RELIST_CONCURRENCY', 2))
+AUTO_RELIST_MAX_SLEEP_SECONDS = float(os.environ.get('AUTO_RELIST_MAX_SLEEP_SECONDS', 6 * 3600))
+AUTO_RELIST_BACKLOG_DELAY_SECONDS = float(os.environ.get('AUTO_RELIST_BACKLOG_DELAY_SECONDS', 60))
+AUTO_RELIST_STARTUP_SPREAD_SECONDS = float(os.environ.get('AUTO_RELIST_STARTUP_SPREAD_SECONDS', 300))
+AUTO_RELIST_LEASE_SECONDS = float(os.environ.get('AUTO_RELIST_LEASE_SECONDS', 600))
+
+def relist_due_query(policy: RelistPolicy, now: datetime) -> dict:
+    cutoff = now - timedelta(days=policy.min_age_days)
+    query: Dict[str, Any] = {
+        "user_id": policy.user_id,
+        "status": "active",
+        "$or": [
+            {"last_relisted": {"$lt": cutoff}},
+            {"last_relisted": None, "created_at": {"$lt": cutoff}}
+        ]
+    }
+    if policy.max_views is not None:
+        query["views"] = {"$lt": policy.max_views}
+    return query
+
+async def next_relist_due_at(policy: RelistPolicy) -> Optional[datetime]:
+    """When the policy's oldest not-yet-due product becomes due, or None if there are none"""
+    base_query: Dict[str, Any] = {"user_id": policy.user_id, "status": "active"}
+    if policy.max_views is not None:
+        base_query["views"] = {"$lt": policy.max_views}
+    candidates = []
+    relisted = await db.products.find(
+        {**base_query, "last_relisted": {"$ne": None}}, {"_id": 0, "last_relisted": 1}
+    ).sort("last_relisted", 1).limit(1).to_list(1)
+    if relisted:
+        candidates.append(relisted[0]["last_relisted"])
+    never_relisted = await db.products.find(
+        {**base_query, "last_relisted": None}, {"_id": 0, "created_at": 1}
+    ).sort("created_at", 1).limit(1).to_list(1)
+    if never_relisted:
+        candidates.append(never_relisted[0]["created_at"])
+    if not candidates:
+        return None
+    return min(candidates) + timedelta(days=policy.min_age_days)
+
+class RelistScheduler:
+    """Relists stale products per user policy, waking only when the earliest policy is due"""
+
+    def __init__(self, concurrency: int = AUTO_RELIST_CONCURRENCY):
+        self.concurrency = concurrency
+        self._heap: List[tuple] = []  # (due_at, user_id)
+        self._due: Dict[str, datetime] = {}
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._running: set = set()
+
+    async def start(self):
+        now = datetime.utcnow()
+        async for policy_doc in db.relist_policies.find({"enabled": True}):
+            due_at = policy_doc.get("next_run_at") or now
+            if due_at <= now:
+                # Spread policies that fell due while we were down instead of running them all at once
+                due_at = now + timedelta(seconds=random.uniform(0, AUTO_RELIST_STARTUP_SPREAD_SECONDS))
+            self.schedule(policy_doc["user_id"], due_at)
+        self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, *self._running, return_exceptions=True)
+            self._task = None
+
+    def schedule(self, user_id: str, due_at: datetime):
+        self._due[user_id] = due_at
+        heapq.heappush(self._heap, (due_at, user_id))
+        self._wakeup.set()
+
+    def unschedule(self, user_id: str):
+        # The heap entry goes stale and is skipped when it is popped
+        self._due.pop(user_id, None)
+
+    async def _loop(self):
+        semaphore = asyncio.Semaphore(self.concurrency)
+        while True:
+            self._wakeup.clear()
+            timeout = None
+            if self._heap:
+                timeout = (self._heap[0][0] - datetime.utcnow()).total_seconds()
+            if timeout is None or timeout > 0:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            due_at, user_id = heapq.heappop(self._heap)
+            if self._due.get(user_id) != due_at:
+                continue
+            del self._due[user_id]
+            await semaphore.acquire()
+            task = asyncio.create_task(self._run_policy(user_id))
+            self._running.add(task)
+            task.add_done_callback(lambda t: (self._running.discard(t), semaphore.release()))
+
+    async def _run_policy(self, user_id: str):
+        now = datetime.utcnow()
+        # Claiming pushes next_run_at forward so another worker process won't run the same policy
+        policy_doc = await db.relist_policies.find_one_and_update(
+            {"user_id": user_id, "enabled": True, "$or": [{"next_run_at": None}, {"next_run_at": {"$lte": now}}]},
+            {"$set": {"next_run_at": now + timedelta(seconds=AUTO_RELIST_LEASE_SECONDS)}},
+            return_document=ReturnDocument.AFTER
+        )
+        if not policy_doc:
+            stored = await db.relist_policies.find_one({"user_id": user_id, "enabled": True})
+            if stored and stored.get("next_run_at"):
+                self.schedule(user_id, stored["next_run_at"])
+            return
+        policy = RelistPolicy(**policy_doc)
+        
+        result: Dict[str, Any] = {"relisted": 0, "failed": 0}
+        try:
+            due_docs = await db.products.find(relist_due_query(policy, now), {"_id": 0, "id": 1}).sort(
+                "last_relisted", 1
+            ).limit(policy.batch_size).to_list(policy.batch_size)
+            if due_docs:
+                user_doc = await db.users.find_one({"id": user_id})
+                vinted_client = VintedClient(user_doc["csrf_token"], user_doc["auth_token"])
+                results = await relist_user_products(
+                    vinted_client, [doc["id"] for doc in due_docs], user_id,
+                    delete_original=policy.delete_original
+                )
+                result["relisted"] = sum(1 for r in results if r["success"])
+                result["failed"] = len(results) - result["relisted"]
+            
+            if len(due_docs) == policy.batch_size:
+                # More products are already due; come back after a pause instead of draining in one go
+                next_run_at = datetime.utcnow() + timedelta(seconds=AUTO_RELIST_BACKLOG_DELAY_SECONDS)
+            else:
+                next_run_at = await next_relist_due_at(policy)
+            max_next_run_at = datetime.utcnow() + timedelta(seconds=AUTO_RELIST_MAX_SLEEP_SECONDS)
+            if next_run_at is None or next_run_at > max_next_run_at:
+                # Also picks up products imported since this run
+                next_run_at = max_next_run_at
+        except Exception as e:
+            logging.error(f"Auto-relist for user {user_id} failed: {str(e)}")
+            result["error"] = str(e)
+            next_run_at = datetime.utcnow() + timedelta(seconds=AUTO_RELIST_BACKLOG_DELAY_SECONDS)
+        
+        await db.relist_policies.update_one(
+            {"user_id": user_id},
+            {"$set": {"next_run_at": next_run_at, "last_run_at": now, "last_result": result}}
+        )
+        self.schedule(user_id, next_run_at)
+
+relist_scheduler = RelistScheduler()
+
 # Routes
 @api_router.post("/auth/login")
 async def login(user_data: UserCreate):
@@ -263,168 +2570,244 @@ async def login(user_data: UserCreate):
             user.dict(), 
             upsert=True
         )
+        auth_cache.invalidate(lambda cached: cached.csrf_token == user_data.csrf_token)
         
         return {"message": "Login successful", "user_id": user.id}
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Invalid credentials: {str(e)}")
 
 @api_router.get("/products/import/{user_id}")
-async def import_products(user_id: str, current_user: User = Depends(get_current_user)):
-    """Import products from Vinted wardrobe"""
-    try:
-        vinted_client = VintedClient(current_user.csrf_token, current_user.auth_token)
-        
-        # Fetch products from Vinted
-        wardrobe_data = await vinted_client.get_user_wardrobe(user_id)
-        
-        if not wardrobe_data or "items" not in wardrobe_data:
-            return {"message": "No products found", "count": 0}
+async def import_products(
+    user_id: str,
+    mode: str = Query("auto", pattern="^(auto|full|incremental)$"),
+    current_user: User = Depends(get_current_user)
+):
+    """Start a background import (sync) of a Vinted wardrobe"""
+    job = await job_queue.submit(Job(type="import", user_id=current_user.id, params={"vinted_user_id": user_id, "mode": mode}))
+    return {"message": "Import started", "job_id": job.id}
+
+@api_router.get("/products")
+async def get_products(
+    request: Request,
+    limit: Optional[int] = Query(None, ge=1),
+    cursor: Optional[str] = None,
+    status: Optional[str] = None,
+    brand: Optional[str] = None,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    sort: str = "-updated_at",
+    fields: Optional[str] = None,
+    format: str = Query("json", pattern="^(json|ndjson)$"),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Get a page of the user's products; the next page's cursor is returned in X-Next-Cursor.
+    With format=ndjson every matching product (up to `limit`, if given) is streamed one per line.
+    """
+    listing = ProductListing(current_user.id, cursor, status, brand, min_price, max_price, sort, fields)
+    products = db.products.find(listing.query, listing.projection).sort(listing.sort)
+    
+    if format == "ndjson":
+        if limit:
+            products = products.limit(limit)
         
-        imported_count = 0
-        for item in wardrobe_data["items"]:
-            try:
-                product = transform_vinted_product(item, current_user.id)
-                
-                # Check if product already exists
-                existing = await db.products.find_one({
-                    "vinted_id": product.vinted_id,
-                    "user_id": current_user.id
-                })
-                
-                if not existing:
-                    await db.products.insert_one(product.dict())
-                    imported_count += 1
-                else:
-                    # Update existing product
-                    await db.products.update_one(
-                        {"vinted_id": product.vinted_id, "user_id": current_user.id},
-                        {"$set": {
-                            "title": product.title,
-                            "price": product.price,
-                            "views": product.views,
-                            "likes": product.likes,
-                            "updated_at": datetime.utcnow()
-                        }}
-                    )
-            except Exception as e:
-                logging.error(f"Error processing product {item.get('id', 'unknown')}: {str(e)}")
-                continue
+        async def stream():
+            async for product in products.batch_size(PRODUCT_STREAM_BATCH_SIZE):
+                yield orjson.dumps(listing.serialize(product)) + b"\n"
         
-        return {"message": f"Imported {imported_count} products", "count": imported_count}
+        return StreamingResponse(stream(), media_type="application/x-ndjson")
     
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Import failed: {str(e)}")
+    limit = limit or 100
+    if limit > PRODUCT_PAGE_MAX:
+        raise HTTPException(status_code=400, detail=f"limit cannot exceed {PRODUCT_PAGE_MAX}; use format=ndjson")
+    
+    async def build_page() -> Response:
+        page = await products.to_list(limit + 1)
+        headers = {}
+        if len(page) > limit:
+            page = page[:limit]
+            headers["X-Next-Cursor"] = listing.next_cursor(page[-1])
+        return ORJSONResponse([listing.serialize(product) for product in page], headers=headers)
+    
+    return await cached_response(request, current_user.id, build_page)
+
+IDEMPOTENCY_KEY_TTL_HOURS = float(os.environ.get('IDEMPOTENCY_KEY_TTL_HOURS', 24))
 
-@api_router.get("/products", response_model=List[VintedProduct])
-async def get_products(current_user: User = Depends(get_current_user)):
-    """Get user's products"""
-    products = await db.products.find({"user_id": current_user.id}).to_list(1000)
-    return [VintedProduct(**product) for product in products]
+def relist_request_fingerprint(request: RelistRequest) -> str:
+    payload = {"product_ids": sorted(set(request.product_ids)), "delete_original": request.delete_original}
+    return hashlib.sha1(json.dumps(payload, sort_keys=True).encode()).hexdigest()
 
 @api_router.post("/products/relist")
-async def relist_products(request: RelistRequest, current_user: User = Depends(get_current_user)):
-    """Relist selected products"""
+async def relist_products(
+    request: RelistRequest,
+    response: Response,
+    idempotency_key: Optional[str] = Header(None, max_length=255),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Start a background relist of selected products. Repeating a request with the same
+    Idempotency-Key returns the original job instead of starting another one.
+    """
+    job = Job(
+        type="relist",
+        user_id=current_user.id,
+        params={"product_ids": request.product_ids, "delete_original": request.delete_original}
+    )
+    if idempotency_key:
+        fingerprint = relist_request_fingerprint(request)
+        try:
+            await db.idempotency_keys.insert_one({
+                "user_id": current_user.id,
+                "key": idempotency_key,
+                "fingerprint": fingerprint,
+                "job_id": job.id,
+                "created_at": datetime.utcnow()
+            })
+        except DuplicateKeyError:
+            original = await db.idempotency_keys.find_one({"user_id": current_user.id, "key": idempotency_key})
+            if original["fingerprint"] != fingerprint:
+                raise HTTPException(status_code=422, detail="Idempotency-Key was already used for a different request")
+            response.headers["Idempotent-Replayed"] = "true"
+            return {"message": "Relist started", "job_id": original["job_id"]}
     try:
-        vinted_client = VintedClient(current_user.csrf_token, current_user.auth_token)
-        
-        results = []
-        for product_id in request.product_ids:
-            try:
-                # Get product from database
-                product_doc = await db.products.find_one({"id": product_id, "user_id": current_user.id})
-                if not product_doc:
-                    results.append({"product_id": product_id, "success": False, "error": "Product not found"})
+        await job_queue.submit(job)
+    except Exception:
+        if idempotency_key:
+            await db.idempotency_keys.delete_one({"user_id": current_user.id, "key": idempotency_key})
+        raise
+    return {"message": "Relist started", "job_id": job.id}
+
+@api_router.get("/relist/policy", response_model=Optional[RelistPolicy])
+async def get_relist_policy(current_user: User = Depends(get_current_user)):
+    """Get the user's auto-relist policy"""
+    policy_doc = await db.relist_policies.find_one({"user_id": current_user.id})
+    return RelistPolicy(**policy_doc) if policy_doc else None
+
+@api_router.put("/relist/policy", response_model=RelistPolicy)
+async def update_relist_policy(update: RelistPolicyUpdate, current_user: User = Depends(get_current_user)):
+    """Create or replace the user's auto-relist policy; an enabled policy is evaluated straight away"""
+    now = datetime.utcnow()
+    policy_doc = await db.relist_policies.find_one_and_update(
+        {"user_id": current_user.id},
+        {"$set": {**update.dict(), "next_run_at": now if update.enabled else None}},
+        upsert=True,
+        return_document=ReturnDocument.AFTER
+    )
+    if update.enabled:
+        relist_scheduler.schedule(current_user.id, now)
+    else:
+        relist_scheduler.unschedule(current_user.id)
+    return RelistPolicy(**policy_doc)
+
+@api_router.get("/jobs/{job_id}", response_model=Job)
+async def get_job(job_id: str, current_user: User = Depends(get_current_user)):
+    """Get the status and progress of a background job"""
+    job_doc = await db.jobs.find_one({"id": job_id, "user_id": current_user.id})
+    if not job_doc:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return Job(**job_doc)
+
+JOB_EVENTS_KEEPALIVE_SECONDS = float(os.environ.get('JOB_EVENTS_KEEPALIVE_SECONDS', 5))
+
+def format_sse(event: str, data: Dict[str, Any]) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+@api_router.get("/jobs/{job_id}/events")
+async def stream_job_events(job_id: str, token: Optional[str] = None, credentials: Optional[HTTPAuthorizationCredentials] = Depends(HTTPBearer(auto_error=False))):
+    """Stream job progress as server-sent events (EventSource clients pass the bearer token as ?token=)"""
+    current_user = await get_user_by_token(credentials.credentials if credentials else token or "")
+    
+    # Subscribe before reading the stored state so no event falls between the two
+    queue = job_events.subscribe(job_id)
+    job_doc = await db.jobs.find_one({"id": job_id, "user_id": current_user.id})
+    if not job_doc:
+        job_events.unsubscribe(job_id, queue)
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    async def stream():
+        try:
+            yield format_sse("progress", job_totals(job_doc))
+            if job_doc["status"] in ("completed", "failed"):
+                yield format_sse("done", {"status": job_doc["status"], "result": job_doc.get("result"), "error": job_doc.get("error")})
+                return
+            while True:
+                try:
+                    event, data = await asyncio.wait_for(queue.get(), timeout=JOB_EVENTS_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    # The job may be running in another worker process; fall back to its stored state
+                    latest = await db.jobs.find_one({"id": job_id})
+                    yield format_sse("progress", job_totals(latest))
+                    if latest["status"] in ("completed", "failed"):
+                        yield format_sse("done", {"status": latest["status"], "result": latest.get("result"), "error": latest.get("error")})
+                        return
                     continue
-                
-                # Note: For full relisting, we would need to handle photo uploads
-                # This is a simplified version that creates a basic relist
-                relist_data = {
-                    "title": product_doc.get("title", ""),
-                    "description": product_doc.get("description", ""),
-                    "price": product_doc.get("price", 0),
-                    "currency": product_doc.get("currency", "GBP"),
-                    "brand": product_doc.get("brand", ""),
-                    "brand_id": 1,  # Default to "List without brand"
-                    "catalog_id": 3829,  # Default category, should be dynamic
-                    "color_ids": [1],  # Default color
-                    "assigned_photos": [],  # Would need photo upload integration
-                    "item_attributes": []
-                }
-                
-                # Create new listing (relist)
-                relist_response = await vinted_client.relist_product(relist_data)
-                
-                # Update last relisted timestamp
-                await db.products.update_one(
-                    {"id": product_id},
-                    {"$set": {"last_relisted": datetime.utcnow()}}
-                )
-                
-                results.append({"product_id": product_id, "success": True, "vinted_response": relist_response})
-                
-            except Exception as e:
-                results.append({"product_id": product_id, "success": False, "error": str(e)})
-        
-        success_count = sum(1 for r in results if r["success"])
-        return {"message": f"Relisted {success_count}/{len(request.product_ids)} products", "results": results}
+                yield format_sse(event, data)
+                if event == "done":
+                    return
+        finally:
+            job_events.unsubscribe(job_id, queue)
     
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Relist failed: {str(e)}")
+    return StreamingResponse(stream(), media_type="text/event-stream", headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@api_router.get("/rate-limits")
+async def get_rate_limits(current_user: User = Depends(get_current_user)):
+    """Current Vinted request budgets for this worker: global and for the user's account"""
+    return rate_governor.budgets(current_user.auth_token)
 
 @api_router.get("/dashboard/stats", response_model=DashboardStats)
-async def get_dashboard_stats(current_user: User = Depends(get_current_user)):
+async def get_dashboard_stats(request: Request, current_user: User = Depends(get_current_user)):
     """Get dashboard statistics"""
-    try:
-        # Get all products for user
-        products = await db.products.find({"user_id": current_user.id}).to_list(1000)
-        
-        total_products = len(products)
-        active_products = len([p for p in products if p.get("status") == "active"])
-        sold_products = len([p for p in products if p.get("status") == "sold"])
-        
-        total_revenue = sum(p.get("price", 0) for p in products if p.get("status") == "sold")
-        total_views = sum(p.get("views", 0) for p in products)
-        
-        # Calculate average sale time (mock for now)
-        avg_sale_time = 12
-        
-        # Recent activity (last 10 actions)
-        recent_activity = []
-        recent_relisted = sorted(
-            [p for p in products if p.get("last_relisted")],
-            key=lambda x: x.get("last_relisted", datetime.min),
-            reverse=True
-        )[:5]
-        
-        for product in recent_relisted:
-            recent_activity.append({
-                "action": "relisted",
-                "product_title": product.get("title", ""),
-                "timestamp": product.get("last_relisted").isoformat() if product.get("last_relisted") else ""
-            })
-        
-        return DashboardStats(
-            total_products=total_products,
-            active_products=active_products,
-            sold_products=sold_products,
-            total_revenue=total_revenue,
-            total_views=total_views,
-            avg_sale_time=avg_sale_time,
-            recent_activity=recent_activity
-        )
+    async def build_stats() -> Response:
+        try:
+            stats = await compute_dashboard_stats(current_user.id)
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Failed to get stats: {str(e)}")
+        return ORJSONResponse(stats.dict())
     
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to get stats: {str(e)}")
+    return await cached_response(request, current_user.id, build_stats)
+
+@api_router.post("/dashboard/stats/rebuild", response_model=DashboardStats)
+async def rebuild_dashboard_stats(current_user: User = Depends(get_current_user)):
+    """Recompute the user's precomputed dashboard stats from their products"""
+    await user_stats.rebuild(current_user.id)
+    return await compute_dashboard_stats(current_user.id)
+
+@api_router.get("/analytics")
+async def get_analytics(
+    days: int = Query(90, ge=1, le=730),
+    bucket: str = Query("week", pattern="^(day|week|month)$"),
+    current_user: User = Depends(get_current_user)
+):
+    """Average time to sale, views gained per relist and activity counts over the last `days`, per period"""
+    return await compute_analytics(current_user.id, days, bucket)
+
+@api_router.get("/events")
+async def get_events(
+    limit: int = Query(50, ge=1, le=500),
+    type: Optional[str] = Query(None, pattern="^(imported|relisted|sold|removed|status_changed)$"),
+    before: Optional[datetime] = None,
+    current_user: User = Depends(get_current_user)
+):
+    """The user's activity history, newest first; pass the last event's timestamp as `before` for the next page"""
+    return await event_log.recent(current_user.id, limit, type, before)
+
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    """Prometheus scrape endpoint"""
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
 
 # Include the router in the main app
 app.include_router(api_router)
 
+app.add_middleware(MetricsMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_credentials=True,
     allow_origins=["*"],
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag", "Idempotent-Replayed"],
 )
 
 # Configure logging
@@ -434,8 +2817,126 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Indexes declared for every hot query; created idempotently on startup
+INDEXES: Dict[str, List[IndexModel]] = {
+    "users": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        IndexModel([("csrf_token", ASCENDING)], name="csrf_token"),
+    ],
+    "products": [
+        # Also stops concurrent imports from inserting the same Vinted item twice
+        IndexModel([("user_id", ASCENDING), ("vinted_id", ASCENDING)], name="user_id_vinted_id_unique", unique=True),
+        IndexModel([("id", ASCENDING), ("user_id", ASCENDING)], name="id_user_id"),
+        # Prefixes of these also serve plain user_id queries
+        IndexModel([("user_id", ASCENDING), ("last_relisted", DESCENDING)], name="user_id_last_relisted"),
+        IndexModel([("user_id", ASCENDING), ("updated_at", DESCENDING), ("id", DESCENDING)], name="user_id_updated_at_id"),
+    ],
+    "relist_policies": [
+        IndexModel([("user_id", ASCENDING)], name="user_id_unique", unique=True),
+        IndexModel([("enabled", ASCENDING), ("next_run_at", ASCENDING)], name="enabled_next_run_at"),
+    ],
+    "events": [
+        # Also serves the analytics pipelines, which always match one user and event type over a time range
+        IndexModel([("meta.user_id", ASCENDING), ("meta.type", ASCENDING), ("timestamp", DESCENDING)], name="user_type_timestamp"),
+        IndexModel([("meta.user_id", ASCENDING), ("timestamp", DESCENDING)], name="user_timestamp"),
+    ],
+    "idempotency_keys": [
+        IndexModel([("user_id", ASCENDING), ("key", ASCENDING)], name="user_id_key_unique", unique=True),
+        IndexModel([("created_at", ASCENDING)], name="created_at_ttl", expireAfterSeconds=int(IDEMPOTENCY_KEY_TTL_HOURS * 3600)),
+    ],
+    "relist_locks": [
+        IndexModel([("product_id", ASCENDING)], name="product_id_unique", unique=True),
+        # Expired locks are taken over straight away; this only cleans them up
+        IndexModel([("expires_at", ASCENDING)], name="expires_at_ttl", expireAfterSeconds=0),
+    ],
+    "user_stats": [
+        IndexModel([("user_id", ASCENDING)], name="user_id_unique", unique=True),
+        IndexModel([("rebuilt_at", ASCENDING)], name="rebuilt_at"),
+    ],
+    "product_versions": [
+        IndexModel([("user_id", ASCENDING)], name="user_id_unique", unique=True),
+    ],
+    "relist_log": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        IndexModel([("state", ASCENDING), ("updated_at", ASCENDING)], name="state_updated_at"),
+        IndexModel([("product_id", ASCENDING), ("state", ASCENDING)], name="product_id_state"),
+    ],
+    "vinted_lookups": [
+        IndexModel([("kind", ASCENDING), ("title", ASCENDING)], name="kind_title_unique", unique=True),
+    ],
+    "sync_state": [
+        IndexModel([("user_id", ASCENDING)], name="user_id_unique", unique=True),
+    ],
+    "jobs": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        IndexModel([("status", ASCENDING), ("heartbeat_at", ASCENDING)], name="status_heartbeat_at"),
+    ],
+}
+
+async def ensure_indexes():
+    """Create any missing indexes and log the build status of each one"""
+    for collection_name, indexes in INDEXES.items():
+        collection = db[collection_name]
+        try:
+            existing = await collection.index_information()
+        except Exception as e:
+            logger.error(f"Could not list indexes on {collection_name}: {str(e)}")
+            continue
+        for index in indexes:
+            name = index.document["name"]
+            if name in existing:
+                logger.info(f"Index {collection_name}.{name} already exists")
+                continue
+            try:
+                started = time.monotonic()
+                await collection.create_indexes([index])
+                logger.info(f"Index {collection_name}.{name} built in {time.monotonic() - started:.2f}s")
+            except Exception as e:
+                logger.error(f"Index {collection_name}.{name} failed to build: {str(e)}")
+
+@app.on_event("startup")
+async def startup_indexes():
+    # Must come first: creating an index would implicitly create events as a regular collection
+    await event_log.ensure_collection()
+    await ensure_indexes()
+
+@app.on_event("startup")
+async def startup_vinted_transport():
+    get_vinted_transport()
+    await rate_governor.start()
+
+@app.on_event("startup")
+async def startup_job_queue():
+    await job_queue.start()
+
+@app.on_event("startup")
+async def startup_relist_scheduler():
+    await relist_scheduler.start()
+
+@app.on_event("startup")
+async def startup_relist_reconciliation():
+    # Runs in the background so a slow Vinted API doesn't hold up startup
+    global relist_reconciler
+    relist_reconciler = asyncio.create_task(relist_log.run())
+
+@app.on_event("startup")
+async def startup_user_stats_reconciliation():
+    global user_stats_reconciler
+    user_stats_reconciler = asyncio.create_task(user_stats.run())
+
 @app.on_event("shutdown")
 async def shutdown_db_client():
+    if relist_reconciler is not None:
+        relist_reconciler.cancel()
+    if user_stats_reconciler is not None:
+        user_stats_reconciler.cancel()
+    await relist_scheduler.stop()
+    await job_queue.stop()
+    await rate_governor.stop()
+    if transform_executor is not None:
+        transform_executor.shutdown(wait=False, cancel_futures=True)
+    if vinted_transport is not None:
+        await vinted_transport.aclose()
     client.close()
 
 from fastapi.staticfiles import StaticFiles
@@ -445,7 +2946,8 @@ from fastapi.responses import FileResponse
 react_build_path = ROOT_DIR.parent / "frontend" / "build"
 
 # Serve React static files
-app.mount("/", StaticFiles(directory=react_build_path, html=True), name="static")
+if react_build_path.is_dir():
+    app.mount("/", StaticFiles(directory=react_build_path, html=True), name="static")
 
 @app.get("/")
 async def serve_react():
@@ -0,0 +1,40 @@
+"""
+Sync the wardrobe of every account that has imported before, outside the API
+server (e.g. from a nightly cron job). Prints the totals as JSON.
+
+    python sync_accounts.py --mode auto --concurrency 16
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+
+import server
+
+
+async def log_result(result):
+    if result["success"]:
+        logging.info(f"Synced account {result['user_id']}: {result['imported']} imported, {result['updated']} updated")
+
+
+async def main(mode: str, concurrency: int):
+    await server.rate_governor.start()
+    try:
+        accounts = await server.batch_sync_accounts()
+        logging.info(f"Syncing {len(accounts)} accounts with {concurrency} workers")
+        result = await server.sync_accounts(accounts, mode, concurrency, on_result=log_result)
+    finally:
+        await server.rate_governor.stop()
+        if server.vinted_transport is not None:
+            await server.vinted_transport.aclose()
+        server.client.close()
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mode", choices=["auto", "full", "incremental"], default="auto")
+    parser.add_argument("--concurrency", type=int, default=server.BATCH_SYNC_CONCURRENCY)
+    args = parser.parse_args()
+    asyncio.run(main(args.mode, args.concurrency))
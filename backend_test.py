@@ -93,6 +93,19 @@ def make_request(method, endpoint, data=None, headers=None, auth_token=None):
         print(f"Request failed: {e}")
         return None
 
+def wait_for_job(job_id, auth_token, timeout=300):
+    """Poll a background job until it completes or fails"""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        response = make_request('GET', f'/jobs/{job_id}', auth_token=auth_token)
+        if response is None or response.status_code != 200:
+            return None
+        job = response.json()
+        if job['status'] in ('completed', 'failed'):
+            return job
+        time.sleep(1)
+    return None
+
 def test_authentication():
     """Test 1: User Authentication System"""
     print("Testing Authentication Endpoint...")
@@ -142,7 +155,11 @@ def test_product_import(user_token):
     
     if response.status_code == 200:
         try:
-            response_data = response.json()
+            job = wait_for_job(response.json().get('job_id'), user_token)
+            if job is None or job['status'] != 'completed':
+                results.add_result("Product Import", False, "Import job did not complete", job)
+                return []
+            response_data = job['result']
             if 'count' in response_data:
                 count = response_data['count']
                 results.add_result("Product Import", True, f"Import successful, imported {count} products", response_data)
@@ -218,7 +235,11 @@ def test_product_relist(user_token, products):
     
     if response.status_code == 200:
         try:
-            response_data = response.json()
+            job = wait_for_job(response.json().get('job_id'), user_token)
+            if job is None or job['status'] != 'completed':
+                results.add_result("Product Relist", False, "Relist job did not complete", job)
+                return
+            response_data = {**job['result'], 'results': job['results']}
             if 'results' in response_data:
                 results.add_result("Product Relist", True, f"Relist completed: {response_data['message']}", response_data)
             else:
@@ -0,0 +1,99 @@
+"""
+Benchmark: dashboard stats computed in Python from every product document
+vs. the single $facet aggregation (now only used to rebuild user_stats) vs.
+reading the precomputed user_stats document. Needs a local mongod; MONGO_URL
+defaults to mongodb://localhost:27017 and a throwaway database is dropped afterwards.
+
+    python benchmarks/bench_dashboard_stats.py --sizes 1000 10000 100000
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from mock_vinted import make_item
+
+import server
+
+USER_ID = "bench-user"
+
+
+async def legacy_stats(user_id):
+    """The pre-aggregation implementation, without the 1,000 document cap so results are comparable"""
+    products = await server.db.products.find({"user_id": user_id}).to_list(None)
+    active_products = len([p for p in products if p.get("status") == "active"])
+    sold_products = len([p for p in products if p.get("status") == "sold"])
+    total_revenue = sum(p.get("price", 0) for p in products if p.get("status") == "sold")
+    total_views = sum(p.get("views", 0) for p in products)
+    recent_relisted = sorted(
+        [p for p in products if p.get("last_relisted")],
+        key=lambda x: x.get("last_relisted", datetime.min),
+        reverse=True
+    )[:5]
+    return len(products), active_products, sold_products, total_revenue, total_views, recent_relisted
+
+
+async def seed(size):
+    await server.db.products.drop()
+    now = datetime.utcnow()
+    batch = []
+    for i in range(1, size + 1):
+        product = server.transform_vinted_product(make_item(i), USER_ID).dict()
+        product["status"] = "sold" if i % 7 == 0 else "active"
+        product["last_relisted"] = now - timedelta(minutes=i) if i % 3 == 0 else None
+        batch.append(product)
+        if len(batch) == 5000:
+            await server.db.products.insert_many(batch)
+            batch = []
+    if batch:
+        await server.db.products.insert_many(batch)
+    await server.db.products.create_index("user_id")
+
+
+async def best_of(runs, func):
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        await func(USER_ID)
+        timings.append(time.perf_counter() - started)
+    return round(min(timings) * 1000, 2)
+
+
+async def main(sizes, runs):
+    mongo = AsyncIOMotorClient(os.environ.get("MONGO_URL", "mongodb://localhost:27017"))
+    server.db = mongo["vrelist_bench_dashboard"]
+    results = []
+    try:
+        for size in sizes:
+            await seed(size)
+            row = {
+                "products": size,
+                "python_ms": await best_of(runs, legacy_stats),
+                "facet_ms": await best_of(runs, server.user_stats.rebuild),
+                "user_stats_ms": await best_of(runs, server.compute_dashboard_stats),
+            }
+            row["facet_speedup"] = round(row["python_ms"] / row["facet_ms"], 1)
+            row["user_stats_speedup"] = round(row["python_ms"] / row["user_stats_ms"], 1)
+            results.append(row)
+    finally:
+        await mongo.drop_database("vrelist_bench_dashboard")
+        mongo.close()
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+    asyncio.run(main(args.sizes, args.runs))
@@ -0,0 +1,88 @@
+"""
+Benchmark: per-item find_one + insert/update import vs. one unordered bulk_write.
+Needs a local mongod; MONGO_URL defaults to mongodb://localhost:27017 and a
+throwaway database is dropped afterwards.
+
+    python benchmarks/bench_import_upsert.py --sizes 100 1000 10000
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from mock_vinted import make_item
+
+import server
+
+
+async def legacy_import(items, user_id):
+    """The pre-bulk import loop: two sequential round trips per item"""
+    imported_count = 0
+    for item in items:
+        product = server.transform_vinted_product(item, user_id)
+        existing = await server.db.products.find_one({"vinted_id": product.vinted_id, "user_id": user_id})
+        if not existing:
+            await server.db.products.insert_one(product.dict())
+            imported_count += 1
+        else:
+            await server.db.products.update_one(
+                {"vinted_id": product.vinted_id, "user_id": user_id},
+                {"$set": {
+                    "title": product.title,
+                    "price": product.price,
+                    "views": product.views,
+                    "likes": product.likes,
+                    "updated_at": datetime.utcnow()
+                }}
+            )
+    return imported_count
+
+
+async def bulk_import(items, user_id):
+    """The current import path: transform every item, then one unordered bulk_write"""
+    products, _ = await server.transform_wardrobe_items(items, user_id)
+    await server.upsert_products(products, user_id)
+
+
+async def timed(coro):
+    started = time.perf_counter()
+    await coro
+    return round(time.perf_counter() - started, 4)
+
+
+async def main(sizes):
+    mongo = AsyncIOMotorClient(os.environ.get("MONGO_URL", "mongodb://localhost:27017"))
+    server.db = mongo["vrelist_bench_import"]
+    results = []
+    try:
+        for size in sizes:
+            items = [make_item(i) for i in range(1, size + 1)]
+            row = {"items": size}
+            for name, importer in (("legacy", legacy_import), ("bulk_write", bulk_import)):
+                await server.db.products.drop()
+                row[f"{name}_insert_s"] = await timed(importer(items, "bench-user"))
+                row[f"{name}_update_s"] = await timed(importer(items, "bench-user"))
+            row["insert_speedup"] = round(row["legacy_insert_s"] / row["bulk_write_insert_s"], 1)
+            row["update_speedup"] = round(row["legacy_update_s"] / row["bulk_write_update_s"], 1)
+            results.append(row)
+    finally:
+        await mongo.drop_database("vrelist_bench_import")
+        mongo.close()
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000])
+    args = parser.parse_args()
+    asyncio.run(main(args.sizes))
@@ -0,0 +1,79 @@
+"""
+Benchmark: event-loop lag while a large wardrobe batch is transformed inline,
+on a thread pool, or on a process pool. A probe task sleeps in short intervals
+and records how late it wakes up; that lag is what every other request served
+by the worker would see. No Mongo or Vinted access is needed.
+
+    python benchmarks/bench_transform_offload.py --sizes 5000 20000
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from mock_vinted import make_item
+
+import server
+
+PROBE_INTERVAL = 0.005
+
+
+async def probe_lag(lags, stop):
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(PROBE_INTERVAL)
+        lags.append(time.perf_counter() - started - PROBE_INTERVAL)
+
+
+async def measure(items, mode):
+    server.TRANSFORM_EXECUTOR = mode
+    server.transform_executor = None
+    executor = server.get_transform_executor()
+    if executor is not None:
+        # Start the workers first, so process spawn time isn't counted as lag
+        await asyncio.get_running_loop().run_in_executor(executor, server.transform_chunk, items[:1], "bench-user")
+
+    lags = []
+    stop = asyncio.Event()
+    probe = asyncio.create_task(probe_lag(lags, stop))
+    await asyncio.sleep(PROBE_INTERVAL * 2)
+    started = time.perf_counter()
+    transformed = [product async for _, product, _ in server.transform_items(items, "bench-user")]
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await probe
+    if executor is not None:
+        executor.shutdown()
+
+    lags.sort()
+    return {
+        "transform_s": round(elapsed, 3),
+        "items_per_s": round(len(transformed) / elapsed),
+        "loop_lag_p99_ms": round(lags[int(len(lags) * 0.99) - 1] * 1000, 2),
+        "loop_lag_max_ms": round(lags[-1] * 1000, 2),
+    }
+
+
+async def main(sizes, modes):
+    results = []
+    for size in sizes:
+        items = [make_item(i) for i in range(1, size + 1)]
+        row = {"items": size}
+        for mode in modes:
+            row[mode] = await measure(items, mode)
+        results.append(row)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[5000, 20000])
+    parser.add_argument("--modes", nargs="+", choices=["inline", "thread", "process"], default=["inline", "thread", "process"])
+    args = parser.parse_args()
+    asyncio.run(main(args.sizes, args.modes))
@@ -0,0 +1,88 @@
+"""
+Benchmark: pooled VintedTransport vs. a new httpx.AsyncClient per call.
+Runs against the local mock Vinted server, so no credentials are needed. The Vinted
+rate limits are raised so the governor doesn't throttle the pooled path; set the
+VINTED_* variables to override them.
+
+    python benchmarks/bench_vinted_transport.py --calls 300 --concurrency 10
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import httpx
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from mock_vinted import MockVintedServer
+
+
+async def run_calls(call, calls: int, concurrency: int) -> dict:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one(i):
+        async with semaphore:
+            started = time.perf_counter()
+            await call(i)
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(calls)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "total_s": round(elapsed, 4),
+        "mean_ms": round(statistics.mean(latencies) * 1000, 3),
+        "p95_ms": round(latencies[int(len(latencies) * 0.95) - 1] * 1000, 3),
+        "calls_per_s": round(calls / elapsed, 1),
+    }
+
+
+async def main(calls: int, concurrency: int):
+    for name in ("VINTED_RATE_PER_SECOND", "VINTED_MAX_RATE_PER_SECOND", "VINTED_GLOBAL_RATE_PER_SECOND",
+                 "VINTED_GLOBAL_MAX_RATE_PER_SECOND", "VINTED_RATE_BURST", "VINTED_GLOBAL_RATE_BURST"):
+        os.environ.setdefault(name, "1000")
+
+    with MockVintedServer() as mock:
+        os.environ["VINTED_BASE_URL"] = mock.base_url
+        import server
+
+        logging.getLogger("httpx").setLevel(logging.WARNING)
+
+        vinted_client = server.VintedClient("bench-csrf", "bench-auth", transport=server.VintedTransport())
+
+        async def per_call_client(i):
+            # The pre-pooling behaviour: one client (and one connection) per call
+            async with httpx.AsyncClient(base_url=mock.base_url) as client:
+                response = await client.get(f"/api/v2/item_upload/items/{i}", headers=vinted_client.headers)
+                response.raise_for_status()
+
+        async def pooled_client(i):
+            await vinted_client.get_product_details(str(i))
+
+        results = {
+            "calls": calls,
+            "concurrency": concurrency,
+            "per_call_client": await run_calls(per_call_client, calls, concurrency),
+            "pooled_transport": await run_calls(pooled_client, calls, concurrency),
+        }
+        await vinted_client.transport.aclose()
+    results["speedup"] = round(results["per_call_client"]["total_s"] / results["pooled_transport"]["total_s"], 2)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--calls", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=10)
+    args = parser.parse_args()
+    asyncio.run(main(args.calls, args.concurrency))
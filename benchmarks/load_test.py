@@ -0,0 +1,262 @@
+"""
+Load test: drives the backend in-process through its HTTP API against the
+local mock Vinted server and reports latency percentiles and throughput as JSON.
+
+Scenarios:
+    import     import a wardrobe of --items items through an import job
+    relist     relist --relist products through a relist job
+    dashboard  --users users each requesting dashboard stats --requests-per-user times, concurrently
+
+Mongo is in-memory (mongomock-motor) unless --mongo-url is given; a throwaway
+database is dropped afterwards. Vinted rate limits are raised so the governor
+does not dominate the timings; set the VINTED_* variables to override them.
+Install the dependencies with `pip install -r benchmarks/requirements.txt`.
+
+    python benchmarks/load_test.py --latency 0.02 --rate-limit-rate 0.01 --output results.json
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from mock_vinted import MockVintedServer, make_item
+
+SCENARIOS = ("import", "relist", "dashboard")
+BENCH_DB = "vrelist_load_test"
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    index = max(0, min(len(sorted_values) - 1, int(round(fraction * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+def throughput(operations, elapsed):
+    return {
+        "count": operations,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_per_s": round(operations / elapsed, 1) if elapsed else None,
+    }
+
+
+def summarize(latencies, elapsed):
+    """Latency percentiles plus throughput for a list of per-operation timings"""
+    latencies = sorted(latencies)
+    summary = {
+        f"{name}_ms": round(percentile(latencies, fraction) * 1000, 2) if latencies else None
+        for name, fraction in (("p50", 0.50), ("p95", 0.95), ("p99", 0.99))
+    }
+    return {**summary, **throughput(len(latencies), elapsed)}
+
+
+class VintedCallRecorder:
+    """httpx event hooks recording the client-side latency of every call to the mock"""
+
+    def __init__(self):
+        self.latencies = []
+
+    async def on_request(self, request):
+        request.extensions["bench_started"] = time.perf_counter()
+
+    async def on_response(self, response):
+        self.latencies.append(time.perf_counter() - response.request.extensions["bench_started"])
+
+    def drain(self):
+        latencies, self.latencies = self.latencies, []
+        return latencies
+
+
+def recording_transport(server, recorder):
+    class RecordingTransport(server.VintedTransport):
+        def client_for(self, account_key):
+            client = super().client_for(account_key)
+            if recorder.on_request not in client.event_hooks["request"]:
+                client.event_hooks["request"].append(recorder.on_request)
+                client.event_hooks["response"].append(recorder.on_response)
+            return client
+
+    return RecordingTransport()
+
+
+async def login(http, name):
+    response = await http.post("/api/auth/login", json={"csrf_token": f"csrf-{name}", "auth_token": f"auth-{name}"})
+    response.raise_for_status()
+    user_id = response.json()["user_id"]
+    return user_id, {"Authorization": f"Bearer {user_id}"}
+
+
+async def wait_for_job(http, headers, job_id, poll_interval=0.05):
+    while True:
+        response = await http.get(f"/api/jobs/{job_id}", headers=headers)
+        response.raise_for_status()
+        job = response.json()
+        if job["status"] in ("completed", "failed"):
+            return job
+        await asyncio.sleep(poll_interval)
+
+
+async def seed_products(server, mock, user_id, count):
+    items = [make_item(i, mock.base_url) for i in range(1, count + 1)]
+    products, _ = await server.transform_wardrobe_items(items, user_id)
+    await server.upsert_products(products, user_id)
+
+
+async def import_scenario(server, http, mock, recorder, args):
+    _, headers = await login(http, "import")
+    recorder.drain()
+    started = time.perf_counter()
+    response = await http.get("/api/products/import/bench-wardrobe", headers=headers, params={"mode": "full"})
+    response.raise_for_status()
+    job = await wait_for_job(http, headers, response.json()["job_id"])
+    elapsed = time.perf_counter() - started
+    return {
+        "job_status": job["status"],
+        "failed": job["failed"],
+        "items": throughput(job["succeeded"], elapsed),
+        "vinted_calls": summarize(recorder.drain(), elapsed),
+    }
+
+
+async def relist_scenario(server, http, mock, recorder, args):
+    user_id, headers = await login(http, "relist")
+    await seed_products(server, mock, user_id, args.relist)
+    product_ids = [p["id"] async for p in server.db.products.find({"user_id": user_id}, {"id": 1})]
+    recorder.drain()
+    started = time.perf_counter()
+    response = await http.post("/api/products/relist", headers=headers, json={"product_ids": product_ids})
+    response.raise_for_status()
+    job = await wait_for_job(http, headers, response.json()["job_id"])
+    elapsed = time.perf_counter() - started
+    return {
+        "job_status": job["status"],
+        "failed": job["failed"],
+        "products": throughput(job["succeeded"], elapsed),
+        "vinted_calls": summarize(recorder.drain(), elapsed),
+    }
+
+
+async def dashboard_scenario(server, http, mock, recorder, args):
+    users = []
+    for i in range(args.users):
+        user_id, headers = await login(http, f"dashboard-{i}")
+        await seed_products(server, mock, user_id, args.dashboard_products)
+        users.append(headers)
+    latencies = []
+    errors = 0
+
+    async def user_session(headers):
+        nonlocal errors
+        for _ in range(args.requests_per_user):
+            request_started = time.perf_counter()
+            response = await http.get("/api/dashboard/stats", headers=headers)
+            latencies.append(time.perf_counter() - request_started)
+            if response.status_code != 200:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(user_session(headers) for headers in users))
+    elapsed = time.perf_counter() - started
+    return {
+        "users": args.users,
+        "errors": errors,
+        "requests": summarize(latencies, elapsed),
+    }
+
+
+SCENARIO_RUNNERS = {
+    "import": import_scenario,
+    "relist": relist_scenario,
+    "dashboard": dashboard_scenario,
+}
+
+
+async def main(args):
+    for name in ("VINTED_RATE_PER_SECOND", "VINTED_MAX_RATE_PER_SECOND", "VINTED_GLOBAL_RATE_PER_SECOND",
+                 "VINTED_GLOBAL_MAX_RATE_PER_SECOND", "VINTED_RATE_BURST", "VINTED_GLOBAL_RATE_BURST"):
+        os.environ.setdefault(name, "1000")
+    os.environ.setdefault("PHOTO_CACHE_DIR", tempfile.mkdtemp(prefix="vrelist-photos-"))
+
+    mock_kwargs = {
+        "total_items": args.items,
+        "latency": args.latency,
+        "rate_limit_rate": args.rate_limit_rate,
+        "retry_after": args.retry_after,
+        "seed": args.seed,
+    }
+    with MockVintedServer(**mock_kwargs) as mock:
+        os.environ["VINTED_BASE_URL"] = mock.base_url
+        import server
+
+        logging.getLogger("httpx").setLevel(logging.WARNING)
+
+        if args.mongo_url:
+            from motor.motor_asyncio import AsyncIOMotorClient
+            mongo = AsyncIOMotorClient(args.mongo_url)
+        else:
+            try:
+                from mongomock_motor import AsyncMongoMockClient
+            except ImportError:
+                sys.exit("mongomock-motor is needed for the in-memory database; install benchmarks/requirements.txt or pass --mongo-url")
+            mongo = AsyncMongoMockClient()
+        server.client = mongo
+        server.db = mongo[BENCH_DB]
+
+        recorder = VintedCallRecorder()
+        server.vinted_transport = recording_transport(server, recorder)
+        await server.job_queue.start()
+
+        results = {
+            "config": {**mock_kwargs, "relist": args.relist, "users": args.users,
+                       "requests_per_user": args.requests_per_user,
+                       "dashboard_products": args.dashboard_products,
+                       "mongo": "external" if args.mongo_url else "in-memory"},
+            "scenarios": {},
+        }
+        try:
+            asgi = httpx.ASGITransport(app=server.app)
+            async with httpx.AsyncClient(transport=asgi, base_url="http://bench", timeout=None) as http:
+                for name in args.scenarios:
+                    results["scenarios"][name] = await SCENARIO_RUNNERS[name](server, http, mock, recorder, args)
+            results["mock"] = {"requests": mock.app.state.requests, "rate_limited": mock.app.state.rate_limited}
+        finally:
+            await server.job_queue.stop()
+            await server.vinted_transport.aclose()
+            if args.mongo_url:
+                await mongo.drop_database(BENCH_DB)
+                mongo.close()
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        Path(args.output).write_text(output + "\n")
+    print(output)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--items", type=int, default=5000)
+    parser.add_argument("--relist", type=int, default=500)
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--requests-per-user", type=int, default=10)
+    parser.add_argument("--dashboard-products", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.0, help="mock response latency in seconds")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="fraction of mock API calls answered with 429")
+    parser.add_argument("--retry-after", type=float, default=1.0, help="Retry-After sent with injected 429s")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--mongo-url", default=None, help="use this MongoDB instead of the in-memory one")
+    parser.add_argument("--output", default=None, help="also write the JSON report to this file")
+    args = parser.parse_args()
+    asyncio.run(main(args))
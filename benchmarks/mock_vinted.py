@@ -0,0 +1,155 @@
+"""
+Local mock of the Vinted endpoints used by the backend.
+Run standalone with: python benchmarks/mock_vinted.py --port 8765
+"""
+
+import argparse
+import asyncio
+import random
+import socket
+import threading
+import time
+import uuid
+
+import uvicorn
+from fastapi import FastAPI, Request, Response
+
+
+PHOTO_BYTES = b"\xff\xd8\xff\xe0" + bytes(range(256)) * 64 + b"\xff\xd9"
+
+
+def make_item(item_id: int, photo_base_url: str = "https://images.example.com") -> dict:
+    return {
+        "id": item_id,
+        "title": f"Mock item {item_id}",
+        "description": "Mock description",
+        "price": {"amount": f"{(item_id % 50) + 5}.00", "currency": "GBP"},
+        "brand": {"id": 1, "title": "Mock brand"},
+        "size_title": "M",
+        "status": "Very good",
+        "catalog": {"id": 3829 + item_id % 3, "title": f"Mock catalog {item_id % 3}"},
+        "size_id": 207,
+        "status_id": 2,
+        "package_size_id": 1,
+        "color1_id": 12,
+        "item_attributes": [{"code": "material", "ids": [44]}],
+        "photos": [{"url": f"{photo_base_url}/photos/{item_id}.jpg"}],
+        "view_count": item_id % 100,
+        "favourite_count": item_id % 10,
+    }
+
+
+def create_mock_app(
+    total_items: int = 100,
+    latency: float = 0.0,
+    rate_limit_rate: float = 0.0,
+    retry_after: float = 1.0,
+    seed: int = 0,
+) -> FastAPI:
+    """
+    Build the mock app. `latency` is added to every response in seconds and a
+    `rate_limit_rate` fraction of API calls is answered with 429 and Retry-After.
+    Injected 429s come from a seeded generator so runs are reproducible.
+    """
+    app = FastAPI()
+    app.state.requests = 0
+    app.state.rate_limited = 0
+    app.state.listings = []
+    rng = random.Random(seed)
+
+    @app.middleware("http")
+    async def count_and_delay(request: Request, call_next):
+        app.state.requests += 1
+        if latency:
+            await asyncio.sleep(latency)
+        if rate_limit_rate and request.url.path.startswith("/api/") and rng.random() < rate_limit_rate:
+            app.state.rate_limited += 1
+            return Response(status_code=429, headers={"Retry-After": str(retry_after)})
+        return await call_next(request)
+
+    @app.get("/api/v2/wardrobe/{user_id}/items")
+    async def wardrobe(request: Request, user_id: str, page: int = 1, per_page: int = 20, order: str = "relevance"):
+        start = (page - 1) * per_page
+        item_ids = range(start + 1, min(start + per_page, total_items) + 1)
+        if order == "newest_first":
+            item_ids = [total_items + 1 - i for i in item_ids]
+        photo_base_url = str(request.base_url).rstrip("/")
+        items = [make_item(i, photo_base_url) for i in item_ids]
+        return {
+            "items": items,
+            "pagination": {
+                "current_page": page,
+                "total_pages": max(1, -(-total_items // per_page)),
+                "total_entries": total_items,
+                "per_page": per_page,
+            },
+        }
+
+    @app.get("/api/v2/item_upload/items/{item_id}")
+    async def item_details(item_id: int):
+        return {"item": make_item(item_id)}
+
+    @app.post("/api/v2/item_upload/items")
+    async def create_item(request: Request):
+        payload = await request.json()
+        app.state.listings.append(payload)
+        return {"item": {"id": uuid.uuid4().int % 10**9, "title": payload["item"].get("title")}, "code": 0}
+
+    @app.get("/photos/{name}")
+    async def photo(name: str):
+        return Response(PHOTO_BYTES, media_type="image/jpeg")
+
+    @app.post("/api/v2/photos")
+    async def upload_photo(request: Request):
+        form = await request.form()
+        await form["photo[file]"].read()
+        return {"id": uuid.uuid4().int % 10**9, "temp_uuid": form["photo[temp_uuid]"]}
+
+    @app.post("/api/v2/items/{item_id}/delete")
+    async def delete_item(item_id: int):
+        return {"code": 0}
+
+    return app
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class MockVintedServer:
+    """Runs the mock app with uvicorn in a background thread"""
+
+    def __init__(self, port: int = None, **app_kwargs):
+        self.port = port or free_port()
+        self.app = create_mock_app(**app_kwargs)
+        config = uvicorn.Config(self.app, host="127.0.0.1", port=self.port, log_level="warning")
+        self.server = uvicorn.Server(config)
+        self.thread = threading.Thread(target=self.server.run, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    def __enter__(self):
+        self.thread.start()
+        while not self.server.started:
+            time.sleep(0.01)
+        return self
+
+    def __exit__(self, *exc):
+        self.server.should_exit = True
+        self.thread.join()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Mock Vinted API server")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--items", type=int, default=100)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--retry-after", type=float, default=1.0)
+    args = parser.parse_args()
+    app = create_mock_app(args.items, args.latency, args.rate_limit_rate, args.retry_after)
+    uvicorn.run(app, host="127.0.0.1", port=args.port)
@@ -5,6 +5,43 @@ import axios from "axios";
 const BACKEND_URL = process.env.REACT_APP_BACKEND_URL;
 const API = `${BACKEND_URL}/api`;
 
+// Product list pages skip descriptions and other detail-only fields
+const PRODUCTS_PAGE_SIZE = 100;
+const PRODUCT_LIST_FIELDS = 'id,title,status,brand,size,price,currency,views,likes,last_relisted,photos';
+
+// Poll a background job until it finishes
+const waitForJob = async (jobId) => {
+  while (true) {
+    const response = await axios.get(`${API}/jobs/${jobId}`);
+    const job = response.data;
+    if (job.status === 'completed') return job;
+    if (job.status === 'failed') throw new Error(job.error);
+    await new Promise(resolve => setTimeout(resolve, 1000));
+  }
+};
+
+// Follow a background job over server-sent events, falling back to polling
+const watchJob = (jobId, onEvent) => new Promise((resolve, reject) => {
+  const token = localStorage.getItem('userId');
+  const source = new EventSource(`${API}/jobs/${jobId}/events?token=${encodeURIComponent(token)}`);
+  let finished = false;
+
+  ['progress', 'item'].forEach(type => {
+    source.addEventListener(type, (e) => onEvent(type, JSON.parse(e.data)));
+  });
+  source.addEventListener('done', (e) => {
+    finished = true;
+    source.close();
+    const job = JSON.parse(e.data);
+    job.status === 'completed' ? resolve(job) : reject(new Error(job.error));
+  });
+  source.onerror = () => {
+    if (finished) return;
+    source.close();
+    waitForJob(jobId).then(resolve, reject);
+  };
+});
+
 // Auth Context
 const AuthContext = createContext();
 
@@ -162,6 +199,8 @@ const Dashboard = () => {
   const [selectedProducts, setSelectedProducts] = useState([]);
   const [isImporting, setIsImporting] = useState(false);
   const [isRelisting, setIsRelisting] = useState(false);
+  const [jobProgress, setJobProgress] = useState(null);
+  const [nextCursor, setNextCursor] = useState(null);
   const { logout } = useAuth();
 
   // Set auth header on mount
@@ -181,10 +220,13 @@ const Dashboard = () => {
     }
   };
 
-  const fetchProducts = async () => {
+  const fetchProducts = async (cursor = null) => {
     try {
-      const response = await axios.get(`${API}/products`);
-      setProducts(response.data);
+      const response = await axios.get(`${API}/products`, {
+        params: { limit: PRODUCTS_PAGE_SIZE, fields: PRODUCT_LIST_FIELDS, cursor: cursor || undefined }
+      });
+      setProducts(prev => cursor ? [...prev, ...response.data] : response.data);
+      setNextCursor(response.headers['x-next-cursor'] || null);
     } catch (error) {
       console.error('Failed to fetch products:', error);
     }
@@ -202,12 +244,16 @@ const Dashboard = () => {
     setIsImporting(true);
     try {
       const response = await axios.get(`${API}/products/import/${userId}`);
-      alert(response.data.message);
+      const job = await watchJob(response.data.job_id, (type, data) => {
+        setJobProgress(type === 'item' ? data.totals : data);
+      });
+      alert(job.result.message);
       await fetchProducts();
       await fetchStats();
     } catch (error) {
       alert('Import failed: ' + (error.response?.data?.detail || error.message));
     }
+    setJobProgress(null);
     setIsImporting(false);
   };
 
@@ -219,15 +265,26 @@ const Dashboard = () => {
 
     setIsRelisting(true);
     try {
+      // Lets the server answer a retried request with the job it already started
+      const idempotencyKey = window.crypto?.randomUUID?.() || `${Date.now()}-${Math.random().toString(36).slice(2)}`;
       const response = await axios.post(`${API}/products/relist`, {
         product_ids: productIds
+      }, {
+        headers: { 'Idempotency-Key': idempotencyKey }
       });
-      alert(response.data.message);
+      const job = await watchJob(response.data.job_id, (type, data) => {
+        setJobProgress(type === 'item' ? data.totals : data);
+        if (type === 'item' && data.success) {
+          const relistedAt = new Date().toISOString();
+          setProducts(prev => prev.map(p => p.id === data.product_id ? { ...p, last_relisted: relistedAt } : p));
+        }
+      });
+      alert(job.result.message);
       setSelectedProducts([]);
-      await fetchProducts();
     } catch (error) {
       alert('Relist failed: ' + (error.response?.data?.detail || error.message));
     }
+    setJobProgress(null);
     setIsRelisting(false);
   };
 
@@ -375,7 +432,9 @@ const Dashboard = () => {
                 <path strokeLinecap="round" strokeLinejoin="round" strokeWidth={2} d="M12 4v16m8-8H4" />
               </svg>
               <h3 className="text-lg font-semibold mb-2">Import Products</h3>
-              <p className="text-sm opacity-90">Import new products from Vinted</p>
+              <p className="text-sm opacity-90">
+                {isImporting && jobProgress ? `Imported ${jobProgress.processed}/${jobProgress.total}` : 'Import new products from Vinted'}
+              </p>
             </div>
           </button>
 
@@ -389,7 +448,9 @@ const Dashboard = () => {
                 <path strokeLinecap="round" strokeLinejoin="round" strokeWidth={2} d="M4 4v5h.582m15.356 2A8.001 8.001 0 004.582 9m0 0H9m11 11v-5h-.581m0 0a8.003 8.003 0 01-15.357-2m15.357 2H15" />
               </svg>
               <h3 className="text-lg font-semibold mb-2">Bulk Relist</h3>
-              <p className="text-sm opacity-90">Relist multiple products at once</p>
+              <p className="text-sm opacity-90">
+                {isRelisting && jobProgress ? `Relisted ${jobProgress.succeeded}/${jobProgress.total}, ${jobProgress.failed} failed` : 'Relist multiple products at once'}
+              </p>
             </div>
           </button>
 
@@ -534,6 +595,16 @@ const Dashboard = () => {
                 ))}
               </div>
             )}
+            {nextCursor && (
+              <div className="text-center mt-6">
+                <button
+                  onClick={() => fetchProducts(nextCursor)}
+                  className="bg-gray-100 hover:bg-gray-200 text-gray-700 px-6 py-2 rounded-lg text-sm font-medium transition-colors"
+                >
+                  Load more
+                </button>
+              </div>
+            )}
           </div>
         </div>
       </div>
@@ -0,0 +1,83 @@
+"""
+Query-plan checks for the indexes created by ensure_indexes.
+Needs a running mongod (MONGO_URL, default mongodb://localhost:27017); skipped otherwise.
+"""
+
+import asyncio
+import os
+import sys
+from pathlib import Path
+
+import pytest
+from pymongo import MongoClient
+from pymongo.errors import PyMongoError
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+MONGO_URL = os.environ.get("MONGO_URL", "mongodb://localhost:27017")
+TEST_DB = "vrelist_test_query_plans"
+
+
+def mongo_available():
+    try:
+        MongoClient(MONGO_URL, serverSelectionTimeoutMS=500).admin.command("ping")
+        return True
+    except PyMongoError:
+        return False
+
+
+pytestmark = pytest.mark.skipif(not mongo_available(), reason="mongod not reachable")
+
+
+def plan_stages(plan):
+    yield plan.get("stage")
+    if "inputStage" in plan:
+        yield from plan_stages(plan["inputStage"])
+    for stage in plan.get("inputStages", []):
+        yield from plan_stages(stage)
+
+
+@pytest.fixture(scope="module")
+def db():
+    from motor.motor_asyncio import AsyncIOMotorClient
+    import server
+
+    mongo = AsyncIOMotorClient(MONGO_URL)
+    server.db = mongo[TEST_DB]
+
+    async def setup():
+        await server.db.users.insert_one({"id": "u1", "csrf_token": "c1", "auth_token": "a1"})
+        await server.db.products.insert_many([
+            {"id": f"p{i}", "vinted_id": str(i), "user_id": "u1", "updated_at": i, "last_relisted": i}
+            for i in range(50)
+        ])
+        await server.ensure_indexes()
+
+    loop = asyncio.new_event_loop()
+    loop.run_until_complete(setup())
+    yield MongoClient(MONGO_URL)[TEST_DB]
+    MongoClient(MONGO_URL).drop_database(TEST_DB)
+    loop.close()
+
+
+HOT_QUERIES = [
+    ("users", {"id": "u1"}, None),
+    ("users", {"csrf_token": "c1"}, None),
+    ("products", {"vinted_id": "1", "user_id": "u1"}, None),
+    ("products", {"id": "p1", "user_id": "u1"}, None),
+    ("products", {"user_id": "u1"}, None),
+    ("products", {"user_id": "u1"}, [("last_relisted", -1)]),
+    ("products", {"user_id": "u1"}, [("updated_at", -1), ("id", -1)]),
+    ("products", {"id": {"$in": ["p1", "p2"]}, "user_id": "u1"}, None),
+]
+
+
+@pytest.mark.parametrize("collection,query,sort", HOT_QUERIES)
+def test_hot_query_uses_index(db, collection, query, sort):
+    cursor = db[collection].find(query)
+    if sort:
+        cursor = cursor.sort(sort)
+    winning_plan = cursor.explain()["queryPlanner"]["winningPlan"]
+    stages = list(plan_stages(winning_plan.get("queryPlan", winning_plan)))
+    assert any(stage and "IXSCAN" in stage for stage in stages), stages
+    assert "COLLSCAN" not in stages
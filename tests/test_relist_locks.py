@@ -0,0 +1,115 @@
+"""
+Relist lock checks: overlapping, repeated or resumed relists of the same products create one Vinted listing each.
+Runs against the local mock Vinted server with an in-memory Mongo (mongomock-motor).
+"""
+
+import asyncio
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "benchmarks"))
+
+mongomock_motor = pytest.importorskip("mongomock_motor")
+
+from mock_vinted import MockVintedServer, make_item
+
+USER_ID = "u1"
+
+
+@pytest.fixture
+def server(monkeypatch, tmp_path):
+    for name in ("VINTED_RATE_PER_SECOND", "VINTED_RATE_BURST", "VINTED_GLOBAL_RATE_PER_SECOND", "VINTED_GLOBAL_RATE_BURST"):
+        monkeypatch.setenv(name, "1000")
+    import server
+
+    monkeypatch.setattr(server, "db", mongomock_motor.AsyncMongoMockClient()["vrelist_test_relist_locks"])
+    monkeypatch.setattr(server, "rate_governor", server.RateGovernor())
+    monkeypatch.setattr(server, "photo_pipeline", server.PhotoPipeline(server.PhotoCache(tmp_path)))
+    monkeypatch.setattr(server, "RELIST_LOCK_POLL_SECONDS", 0.05)
+    return server
+
+
+@pytest.fixture
+def mock(server, monkeypatch):
+    with MockVintedServer(latency=0.1) as mock:
+        monkeypatch.setattr(server, "VINTED_BASE_URL", mock.base_url)
+        yield mock
+
+
+async def seed_products(server, mock, count):
+    await server.ensure_indexes()
+    products, _ = await server.transform_wardrobe_items([make_item(i, mock.base_url) for i in range(1, count + 1)], USER_ID)
+    await server.upsert_products(products, USER_ID)
+    return [p.id for p in products]
+
+
+async def relist_concurrently(server, mock, count, product_id_lists):
+    product_ids = await seed_products(server, mock, count)
+    transport = server.VintedTransport()
+    vinted_client = server.VintedClient("csrf", "auth", transport=transport)
+
+    async def relist(indexes, delay):
+        await asyncio.sleep(delay)
+        return await server.relist_user_products(vinted_client, [product_ids[i] for i in indexes], USER_ID)
+
+    try:
+        return await asyncio.gather(*(relist(indexes, 0.05 * n) for n, indexes in enumerate(product_id_lists)))
+    finally:
+        await transport.aclose()
+
+
+def test_overlapping_relists_coalesce_after_lock_ttl(server, mock, monkeypatch):
+    # One relist at a time, so the last products wait far longer than the lock TTL for a slot
+    monkeypatch.setattr(server, "RELIST_CONCURRENCY", 1)
+    monkeypatch.setattr(server, "RELIST_LOCK_TTL_SECONDS", 0.5)
+    monkeypatch.setattr(server, "RELIST_LOCK_RENEW_SECONDS", 0.1)
+
+    first, second = asyncio.run(relist_concurrently(server, mock, 4, [[0, 1, 2, 3], [0, 1, 2, 3]]))
+
+    assert len(mock.app.state.listings) == 4
+    assert all(result["success"] and not result.get("coalesced") for result in first)
+    assert all(result["success"] and result["coalesced"] for result in second)
+
+
+def test_duplicate_ids_in_one_request_relist_once(server, mock):
+    (results,) = asyncio.run(relist_concurrently(server, mock, 2, [[0, 1, 0]]))
+
+    assert len(mock.app.state.listings) == 2
+    assert [result["product_id"] for result in results] == [results[0]["product_id"], results[1]["product_id"], results[0]["product_id"]]
+    assert all(result["success"] for result in results)
+
+
+def test_resumed_job_finishes_a_listing_created_before_the_crash(server, mock):
+    async def run():
+        (product_id,) = await seed_products(server, mock, 1)
+        # The job crashed after Vinted created listing 999 but before the product was updated
+        now = datetime.utcnow()
+        await server.db.relist_locks.insert_one({
+            "product_id": product_id, "user_id": USER_ID, "owner": "job1", "token": "t1",
+            "state": "in_progress", "result": None, "expires_at": now + timedelta(minutes=2)
+        })
+        await server.db.relist_log.insert_one({
+            "id": "e1", "user_id": USER_ID, "product_id": product_id, "old_vinted_id": "1", "new_vinted_id": "999",
+            "delete_original": True, "state": "created", "product_updated": False, "created_at": now, "updated_at": now
+        })
+        transport = server.VintedTransport()
+        try:
+            vinted_client = server.VintedClient("csrf", "auth", transport=transport)
+            (result,) = await server.relist_user_products(vinted_client, [product_id], USER_ID, delete_original=True, lock_owner="job1")
+        finally:
+            await transport.aclose()
+        await server.relist_log.reconcile()
+        product = await server.db.products.find_one({"id": product_id})
+        entry = await server.db.relist_log.find_one({"id": "e1"})
+        return result, product, entry
+
+    result, product, entry = asyncio.run(run())
+
+    assert result["success"] and result["resumed"]
+    assert mock.app.state.listings == []
+    assert product["vinted_id"] == "999"
+    assert entry["state"] == "completed"
@@ -0,0 +1,60 @@
+"""
+Wardrobe sync checks against an in-memory Mongo (mongomock-motor), with the wardrobe served by a stub client.
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "benchmarks"))
+
+mongomock_motor = pytest.importorskip("mongomock_motor")
+
+from mock_vinted import make_item
+
+USER_ID = "u1"
+
+
+class StubWardrobeClient:
+    """Serves a fixed list of item ids as the whole wardrobe"""
+
+    def __init__(self):
+        self.item_ids = []
+
+    async def get_full_wardrobe(self, vinted_user_id):
+        return {"items": [make_item(i) for i in self.item_ids], "failed_pages": []}
+
+
+@pytest.fixture
+def server(monkeypatch):
+    import server
+
+    monkeypatch.setattr(server, "db", mongomock_motor.AsyncMongoMockClient()["vrelist_test_wardrobe_sync"])
+    return server
+
+
+def test_item_back_in_wardrobe_is_active_again(server):
+    vinted_client = StubWardrobeClient()
+
+    async def sync(item_ids):
+        vinted_client.item_ids = item_ids
+        return await server.sync_wardrobe(vinted_client, "vinted-user", USER_ID, mode="full")
+
+    async def statuses():
+        return {p["vinted_id"]: p["status"] async for p in server.db.products.find({"user_id": USER_ID})}
+
+    async def run():
+        await sync([1, 2, 3])
+        removed = await sync([1, 2])
+        assert removed["removed"] == 1
+        assert (await statuses())["3"] == "deleted"
+
+        back = await sync([1, 2, 3])
+        assert back["updated"] == 1
+        assert back["unchanged"] == 2
+        assert await statuses() == {"1": "active", "2": "active", "3": "active"}
+
+    asyncio.run(run())